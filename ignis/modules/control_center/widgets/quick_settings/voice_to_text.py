@@ -1,3 +1,4 @@
+import os
 import subprocess
 import asyncio
 from ignis import widgets
@@ -5,6 +6,13 @@ from ignis.variable import Variable
 from gi.repository import GObject  # type: ignore
 from typing import Callable
 
+# Control socket of `voice_to_text.py --daemon`
+VOICE_TO_TEXT_SOCKET = os.path.join(
+    os.environ.get("XDG_RUNTIME_DIR", "/tmp"), "voice_to_text.sock"
+)
+# How often to ask the daemon whether a session started elsewhere has ended
+VOICE_TO_TEXT_STATUS_INTERVAL = 0.5
+
 
 # Standalone QSButton implementation to avoid import issues
 class VoiceToTextQSButton(widgets.Button):
@@ -60,15 +68,38 @@ class VoiceToTextService:
     def __init__(self):
         self.is_recording = Variable(False)
         self.process = None
-    
+        self._daemon_session = False
+
+    async def _send_daemon_command(self, command: str) -> str:
+        """Send one command to the voice-to-text daemon and wait for the reply."""
+        reader, writer = await asyncio.open_unix_connection(VOICE_TO_TEXT_SOCKET)
+        try:
+            writer.write(f"{command}\n".encode())
+            await writer.drain()
+            return (await reader.readline()).decode().strip()
+        finally:
+            writer.close()
+
     async def start_recording(self):
         """Start voice-to-text recording."""
-        if self.process and self.process.poll() is None:
+        if self._daemon_session or (self.process and self.process.poll() is None):
             return  # Already running
         
         self.is_recording.set_value(True)
         
         try:
+            # Prefer the warm daemon; "start" replies "done" once the session
+            # is over
+            self._daemon_session = True
+            try:
+                reply = await self._send_daemon_command("start")
+            except OSError:
+                self._daemon_session = False
+            else:
+                if reply == "busy":
+                    await self._wait_for_daemon_idle()
+                return
+
             # Start the voice-to-text script
             self.process = subprocess.Popen(
                 ["uv", "run", "/home/tyler/dotfiles/scripts/voice_to_text.py"],
@@ -84,19 +115,33 @@ class VoiceToTextService:
             print(f"Error starting voice-to-text: {e}")
         finally:
             self.is_recording.set_value(False)
+            self._daemon_session = False
             self.process = None
     
+    async def _wait_for_daemon_idle(self):
+        """Stay active while a session started elsewhere (e.g. the keybind) runs."""
+        while True:
+            status = await self._send_daemon_command("status")
+            if not status.startswith("recording"):
+                return
+            await asyncio.sleep(VOICE_TO_TEXT_STATUS_INTERVAL)
+
     async def _wait_for_process(self):
         """Wait for the voice-to-text process to complete."""
         if not self.process:
             return
-        
+
         # Run in executor to avoid blocking
         loop = asyncio.get_event_loop()
         await loop.run_in_executor(None, self.process.wait)
     
     def stop_recording(self):
         """Stop voice-to-text recording."""
+        if self._daemon_session:
+            # The pending "start" request clears the state when the daemon
+            # finishes transcribing what was already captured
+            asyncio.create_task(self._send_daemon_command("stop"))
+            return
         if self.process and self.process.poll() is None:
             self.process.terminate()
         self.is_recording.set_value(False)
@@ -16,6 +16,8 @@ window_manager = WindowManager.get_default()
 applications = ApplicationsService.get_default()
 
 TERMINAL_FORMAT = "kitty %command%"
+# Seconds to wait for typing to pause before searching
+SEARCH_DEBOUNCE = 0.06
 
 
 def is_url(url: str) -> bool:
@@ -36,27 +38,32 @@ def is_url(url: str) -> bool:
 class LauncherAppItem(widgets.Button):
     def __init__(self, application: Application) -> None:
         self._menu = widgets.PopoverMenu()
+        self._icon = widgets.Icon(pixel_size=48)
+        self._label = widgets.Label(
+            ellipsize="end",
+            max_width_chars=30,
+            css_classes=["launcher-app-label"],
+        )
 
-        self._application = application
         super().__init__(
             on_click=lambda x: self.launch(),
-            on_right_click=lambda x: self._menu.popup(),
+            on_right_click=lambda x: self.__open_menu(),
             css_classes=["launcher-app"],
-            child=widgets.Box(
-                child=[
-                    widgets.Icon(image=application.icon, pixel_size=48),
-                    widgets.Label(
-                        label=application.name,
-                        ellipsize="end",
-                        max_width_chars=30,
-                        css_classes=["launcher-app-label"],
-                    ),
-                    self._menu,
-                ]
-            ),
+            child=widgets.Box(child=[self._icon, self._label, self._menu]),
         )
+        self.bind(application)
+
+    def bind(self, application: Application) -> None:
+        """Show `application` in this row; rows are reused across searches."""
+        self._application = application
+        self._icon.image = application.icon
+        self._label.label = application.name
+
+    def __open_menu(self) -> None:
+        # Built on demand so binding a row stays cheap, and it always
+        # reflects the current pin state
         self.__sync_menu()
-        application.connect("notify::is-pinned", lambda x, y: self.__sync_menu())
+        self._menu.popup()
 
     def launch(self) -> None:
         self._application.launch(terminal_format=TERMINAL_FORMAT)
@@ -88,7 +95,6 @@ class LauncherAppItem(widgets.Button):
 
 class SearchWebButton(widgets.Button):
     def __init__(self, query: str):
-        self._query = query
         self._url = ""
 
         browser_desktop_file = utils.exec_sh(
@@ -103,15 +109,7 @@ class SearchWebButton(widgets.Button):
             if icon_string:
                 icon_name = icon_string
 
-        if not query.startswith(("http://", "https://")) and "." in query:
-            query = "https://" + query
-
-        if is_url(query):
-            label = f"Visit {query}"
-            self._url = query
-        else:
-            label = "Search in Google"
-            self._url = f"https://www.google.com/search?q={query.replace(' ', '+')}"
+        self._label = widgets.Label(css_classes=["launcher-app-label"])
 
         super().__init__(
             on_click=lambda x: self.launch(),
@@ -119,13 +117,22 @@ class SearchWebButton(widgets.Button):
             child=widgets.Box(
                 child=[
                     widgets.Icon(image=icon_name, pixel_size=48),
-                    widgets.Label(
-                        label=label,
-                        css_classes=["launcher-app-label"],
-                    ),
+                    self._label,
                 ]
             ),
         )
+        self.bind(query)
+
+    def bind(self, query: str) -> None:
+        if not query.startswith(("http://", "https://")) and "." in query:
+            query = "https://" + query
+
+        if is_url(query):
+            self._label.label = f"Visit {query}"
+            self._url = query
+        else:
+            self._label.label = "Search in Google"
+            self._url = f"https://www.google.com/search?q={query.replace(' ', '+')}"
 
     def launch(self) -> None:
         asyncio.create_task(utils.exec_sh_async(f"xdg-open {self._url}"))
@@ -134,6 +141,12 @@ class SearchWebButton(widgets.Button):
 
 class Launcher(widgets.Window):
     def __init__(self):
+        self._search_task: asyncio.Task | None = None
+        # Result rows are created once and rebound on every search; the
+        # web button looks up the default browser, so it's made on demand
+        self._app_rows: list[LauncherAppItem] = []
+        self._web_button: SearchWebButton | None = None
+        self._shown: list[widgets.Button] = []
         self._app_list = widgets.Box(
             vertical=True, visible=False, style="margin-top: 1rem;"
         )
@@ -195,10 +208,19 @@ class Launcher(widgets.Window):
         self._entry.grab_focus()
 
     def __on_accept(self, *args) -> None:
-        if len(self._app_list.child) > 0:
-            self._app_list.child[0].launch()
+        # Don't launch a result of an earlier keystroke
+        if self._search_task is not None and not self._search_task.done():
+            self._search_task.cancel()
+            self.__show_results(self._entry.text)
+        if self._shown:
+            self._shown[0].launch()
 
     def __search(self, *args) -> None:
+        # A newer query replaces any search still waiting to run
+        if self._search_task is not None:
+            self._search_task.cancel()
+            self._search_task = None
+
         query = self._entry.text
 
         if query == "":
@@ -206,9 +228,36 @@ class Launcher(widgets.Window):
             self._app_list.visible = False
             return
 
-        apps = applications.search(applications.apps, query)
+        self._search_task = asyncio.create_task(self.__run_search(query))
+
+    async def __run_search(self, query: str) -> None:
+        await asyncio.sleep(SEARCH_DEBOUNCE)
+        # Matching a few hundred apps is quick; it stays on the main loop
+        # since Application objects aren't safe to read from a thread
+        self.__show_results(query)
+
+    def __show_results(self, query: str) -> None:
+        apps = applications.search(applications.apps, query)[:5]
         if apps == []:
-            self._app_list.child = [SearchWebButton(query)]
+            if self._web_button is None:
+                self._web_button = SearchWebButton(query)
+            else:
+                self._web_button.bind(query)
+            self.__show_rows([self._web_button])
         else:
-            self._app_list.visible = True
-            self._app_list.child = [LauncherAppItem(i) for i in apps[:5]]
+            for row, app in zip(self._app_rows, apps):
+                row.bind(app)
+            for app in apps[len(self._app_rows) :]:
+                self._app_rows.append(LauncherAppItem(app))
+            self.__show_rows(self._app_rows[: len(apps)])
+
+    def __show_rows(self, rows: list[widgets.Button]) -> None:
+        # Reparent only when switching between app rows and the web button
+        # or when the pool grew; fewer results just hide the spare rows
+        pool = [self._web_button] if rows[0] is self._web_button else self._app_rows
+        if self._app_list.child != pool:
+            self._app_list.child = list(pool)
+        for row in pool:
+            row.visible = row in rows
+        self._app_list.visible = True
+        self._shown = rows
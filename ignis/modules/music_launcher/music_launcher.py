@@ -5,11 +5,18 @@ import shlex
 from ignis import widgets
 from ignis.window_manager import WindowManager
 from ignis import utils
-from gi.repository import Gtk, Gdk
+from gi.repository import Gtk, Gdk, Gio, GObject
+from services.mpd_library import mpd_library_service
+from modules.music_launcher.search_index import SearchIndex
 
 window_manager = WindowManager.get_default()
 
 SEARCH_MODES = ["All Songs", "Artists", "Albums", "Playlists"]
+# Seconds to wait for typing to pause before searching
+SEARCH_DEBOUNCE = 0.06
+# Height of the scrollable result list, and rows moved by Page Up/Down
+RESULTS_MAX_HEIGHT = 520
+RESULTS_PAGE = 8
 
 
 def _format_track_display(track_path: str) -> str:
@@ -31,9 +38,18 @@ def _format_track_display(track_path: str) -> str:
         return song_name
 
 
+def _result_label() -> widgets.Label:
+    return widgets.Label(
+        ellipsize="end",
+        max_width_chars=60,
+        css_classes=["music-track-label"],
+    )
+
+
 class MusicTrackItem(widgets.Button):
-    def __init__(self, track_path: str, display_text: str) -> None:
-        self._track_path = track_path
+    def __init__(self) -> None:
+        self._track_path = ""
+        self._label = _result_label()
         super().__init__(
             on_click=lambda x: self.play(),
             css_classes=["music-track"],
@@ -44,23 +60,27 @@ class MusicTrackItem(widgets.Button):
                         pixel_size=32,
                         style="margin-right: 0.75rem;",
                     ),
-                    widgets.Label(
-                        label=display_text,
-                        ellipsize="end",
-                        max_width_chars=60,
-                        css_classes=["music-track-label"],
-                    ),
+                    self._label,
                 ]
             ),
         )
 
+    def bind(self, track_path: str, display_text: str) -> None:
+        """Show another track in this row; the list view recycles rows."""
+        self._track_path = track_path
+        self._label.label = display_text
+
     def play(self) -> None:
+        self.play_item(self._track_path)
+
+    @staticmethod
+    def play_item(track_path: str) -> None:
         window_manager.close_window("ignis_MUSIC_LAUNCHER")
-        escaped_track = shlex.quote(self._track_path)
+        escaped_track = shlex.quote(track_path)
         # mpc next fails when stopped; insert appends to the queue end in that
         # state, so fall back to playing the last queue position
         command = (
-            f'mpc insert {escaped_track} && '
+            f"mpc insert {escaped_track} && "
             '{ mpc next || mpc play "$(mpc playlist | wc -l)"; } >/dev/null 2>&1 && '
             f'notify-send "Playing {escaped_track}"'
         )
@@ -68,8 +88,9 @@ class MusicTrackItem(widgets.Button):
 
 
 class MusicArtistItem(widgets.Button):
-    def __init__(self, artist_name: str) -> None:
-        self._artist_name = artist_name
+    def __init__(self) -> None:
+        self._artist_name = ""
+        self._label = _result_label()
         super().__init__(
             on_click=lambda x: self.play(),
             css_classes=["music-track"],
@@ -80,24 +101,27 @@ class MusicArtistItem(widgets.Button):
                         pixel_size=32,
                         style="margin-right: 0.75rem;",
                     ),
-                    widgets.Label(
-                        label=artist_name,
-                        ellipsize="end",
-                        max_width_chars=60,
-                        css_classes=["music-track-label"],
-                    ),
+                    self._label,
                 ]
             ),
         )
 
+    def bind(self, artist_name: str, display_text: str) -> None:
+        self._artist_name = artist_name
+        self._label.label = display_text
+
     def play(self) -> None:
+        self.play_item(self._artist_name)
+
+    @staticmethod
+    def play_item(artist_name: str) -> None:
         window_manager.close_window("ignis_MUSIC_LAUNCHER")
-        escaped = shlex.quote(self._artist_name)
+        escaped = shlex.quote(artist_name)
         # findadd appends to the queue end regardless of state, so jump to the
         # first appended track instead of relying on mpc next
         command = (
-            'pos=$(($(mpc playlist | wc -l) + 1)); '
-            f'mpc findadd artist {escaped} && '
+            "pos=$(($(mpc playlist | wc -l) + 1)); "
+            f"mpc findadd artist {escaped} && "
             'mpc play "$pos" >/dev/null && '
             f'notify-send "Playing artist {escaped}"'
         )
@@ -105,8 +129,9 @@ class MusicArtistItem(widgets.Button):
 
 
 class MusicAlbumItem(widgets.Button):
-    def __init__(self, album_name: str) -> None:
-        self._album_name = album_name
+    def __init__(self) -> None:
+        self._album_name = ""
+        self._label = _result_label()
         super().__init__(
             on_click=lambda x: self.play(),
             css_classes=["music-track"],
@@ -117,26 +142,30 @@ class MusicAlbumItem(widgets.Button):
                         pixel_size=32,
                         style="margin-right: 0.75rem;",
                     ),
-                    widgets.Label(
-                        label=album_name,
-                        ellipsize="end",
-                        max_width_chars=60,
-                        css_classes=["music-track-label"],
-                    ),
+                    self._label,
                 ]
             ),
         )
 
+    def bind(self, album_name: str, display_text: str) -> None:
+        self._album_name = album_name
+        self._label.label = display_text
+
     def play(self) -> None:
+        self.play_item(self._album_name)
+
+    @staticmethod
+    def play_item(album_name: str) -> None:
         window_manager.close_window("ignis_MUSIC_LAUNCHER")
-        escaped = shlex.quote(self._album_name)
+        escaped = shlex.quote(album_name)
         command = f'mpc clear && mpc findadd album {escaped} && mpc play && notify-send "Playing album {escaped}"'
         asyncio.create_task(utils.exec_sh_async(command))
 
 
 class MusicPlaylistItem(widgets.Button):
-    def __init__(self, playlist_name: str) -> None:
-        self._playlist_name = playlist_name
+    def __init__(self) -> None:
+        self._playlist_name = ""
+        self._label = _result_label()
         super().__init__(
             on_click=lambda x: self.play(),
             css_classes=["music-track"],
@@ -147,30 +176,119 @@ class MusicPlaylistItem(widgets.Button):
                         pixel_size=32,
                         style="margin-right: 0.75rem;",
                     ),
-                    widgets.Label(
-                        label=playlist_name,
-                        ellipsize="end",
-                        max_width_chars=60,
-                        css_classes=["music-track-label"],
-                    ),
+                    self._label,
                 ]
             ),
         )
 
+    def bind(self, playlist_name: str, display_text: str) -> None:
+        self._playlist_name = playlist_name
+        self._label.label = display_text
+
     def play(self) -> None:
+        self.play_item(self._playlist_name)
+
+    @staticmethod
+    def play_item(playlist_name: str) -> None:
         window_manager.close_window("ignis_MUSIC_LAUNCHER")
-        escaped = shlex.quote(self._playlist_name)
+        escaped = shlex.quote(playlist_name)
         command = f'mpc clear && mpc load {escaped} && mpc play && notify-send "Playing playlist {escaped}"'
         asyncio.create_task(utils.exec_sh_async(command))
 
 
+RESULT_ROWS = {
+    "All Songs": MusicTrackItem,
+    "Artists": MusicArtistItem,
+    "Albums": MusicAlbumItem,
+    "Playlists": MusicPlaylistItem,
+}
+
+
+class MusicMatch(GObject.Object):
+    def __init__(self, item: str, display_text: str) -> None:
+        super().__init__()
+        self.item = item
+        self.display_text = display_text
+
+
+class MatchList(GObject.Object, Gio.ListModel):
+    """List model over the results of a search.
+
+    Holds only the matching index positions; the list view asks for
+    items of the rows it shows, so a search with 100k matches costs no
+    more to display than one with ten.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._index: SearchIndex | None = None
+        self._matches: list[int] = []
+
+    def do_get_item_type(self) -> GObject.GType:
+        return MusicMatch.__gtype__
+
+    def do_get_n_items(self) -> int:
+        return len(self._matches)
+
+    def do_get_item(self, position: int) -> MusicMatch | None:
+        if position >= len(self._matches):
+            return None
+        i = self._matches[position]
+        return MusicMatch(self._index.items[i], self._index.displays[i])
+
+    def set_matches(self, index: SearchIndex | None, matches: list[int]) -> None:
+        removed = len(self._matches)
+        self._index = index
+        self._matches = matches
+        self.items_changed(0, removed, len(matches))
+
+
+def _result_factory(row_type: type) -> Gtk.SignalListItemFactory:
+    factory = Gtk.SignalListItemFactory()
+    factory.connect("setup", lambda f, list_item: list_item.set_child(row_type()))
+    factory.connect(
+        "bind",
+        lambda f, list_item: list_item.get_child().bind(
+            list_item.get_item().item, list_item.get_item().display_text
+        ),
+    )
+    return factory
+
+
 class MusicLauncher(widgets.Window):
     def __init__(self):
         self._mode_index = 0
-        self._data = {mode: [] for mode in SEARCH_MODES}
+        # Built in a thread on first use per mode, dropped when the library
+        # reloads
+        self._indexes: dict[str, asyncio.Future] = {}
+        self._search_task: asyncio.Task | None = None
+        # Every match goes in the model; the list view only creates and
+        # binds rows for what's on screen, with one row type per mode
+        self._matches = MatchList()
+        self._shown_mode = SEARCH_MODES[0]
+        self._selection = Gtk.SingleSelection(model=self._matches)
+        self._factories = {m: _result_factory(RESULT_ROWS[m]) for m in SEARCH_MODES}
+        self._list_view = Gtk.ListView(
+            model=self._selection,
+            factory=self._factories[self._shown_mode],
+            css_classes=["music-results"],
+        )
+        self._scroll = widgets.Scroll(
+            child=self._list_view,
+            hscrollbar_policy=Gtk.PolicyType.NEVER,
+            propagate_natural_height=True,
+            max_content_height=RESULTS_MAX_HEIGHT,
+        )
+        self._match_count = widgets.Label(
+            halign="start", css_classes=["music-match-count"]
+        )
+        self._no_results = self.__no_results_label()
 
         self._track_list = widgets.Box(
-            vertical=True, visible=False, style="margin-top: 1rem;"
+            vertical=True,
+            visible=False,
+            style="margin-top: 1rem;",
+            child=[self._match_count, self._scroll, self._no_results],
         )
         self._entry = widgets.Entry(
             hexpand=True,
@@ -255,32 +373,32 @@ class MusicLauncher(widgets.Window):
             ),
         )
 
-        self.__load_all_data()
+        # Once started, the library service loads in the background and
+        # reloads on MPD database changes; refresh open results when that
+        # happens
+        mpd_library_service.revision.connect("notify::value", self.__on_reload)
 
-    def __load_all_data(self) -> None:
-        result = utils.exec_sh("mpc listall")
-        if result.stdout:
-            self._data["All Songs"] = [
-                t.strip() for t in result.stdout.split("\n") if t.strip()
-            ]
-
-        result = utils.exec_sh("mpc list artist")
-        if result.stdout:
-            self._data["Artists"] = [
-                a.strip() for a in result.stdout.split("\n") if a.strip()
-            ]
-
-        result = utils.exec_sh("mpc list album")
-        if result.stdout:
-            self._data["Albums"] = [
-                a.strip() for a in result.stdout.split("\n") if a.strip()
-            ]
+    def __on_reload(self, *args) -> None:
+        self._indexes.clear()
+        if self.visible:
+            self.__search()
 
-        result = utils.exec_sh("mpc lsplaylists")
-        if result.stdout:
-            self._data["Playlists"] = [
-                p.strip() for p in result.stdout.split("\n") if p.strip()
-            ]
+    def __index(self, mode: str) -> asyncio.Future:
+        if mode not in self._indexes:
+            if mode == "All Songs":
+                args = (mpd_library_service.tracks, _format_track_display)
+            else:
+                args = (
+                    {
+                        "Artists": mpd_library_service.artists,
+                        "Albums": mpd_library_service.albums,
+                        "Playlists": mpd_library_service.playlists,
+                    }[mode],
+                )
+            self._indexes[mode] = asyncio.ensure_future(
+                asyncio.to_thread(SearchIndex, *args)
+            )
+        return self._indexes[mode]
 
     def __on_open(self, *args) -> None:
         if not self.visible:
@@ -290,21 +408,47 @@ class MusicLauncher(widgets.Window):
         self._mode_index = 0
         self.__update_mode_labels()
         self._entry.grab_focus()
-        self.__load_all_data()
+        # The library loads on first open; the search reruns when it arrives
+        mpd_library_service.start()
+        # Start building the song index while the first query is typed
+        self.__index(SEARCH_MODES[0])
 
     def __on_key_pressed(self, controller, keyval, keycode, state) -> bool:
         if keyval == Gdk.KEY_Tab:
             self._mode_index = (self._mode_index + 1) % len(SEARCH_MODES)
             self.__update_mode_labels()
-            self.__search()
+            self.__search(delay=0)
             return True
         if keyval == Gdk.KEY_ISO_Left_Tab:
             self._mode_index = (self._mode_index - 1) % len(SEARCH_MODES)
             self.__update_mode_labels()
-            self.__search()
+            self.__search(delay=0)
+            return True
+        if keyval in (Gdk.KEY_Down, Gdk.KEY_Up, Gdk.KEY_Page_Down, Gdk.KEY_Page_Up):
+            step = RESULTS_PAGE if keyval in (Gdk.KEY_Page_Down, Gdk.KEY_Page_Up) else 1
+            if keyval in (Gdk.KEY_Up, Gdk.KEY_Page_Up):
+                step = -step
+            self.__move_selection(step)
             return True
         return False
 
+    def __move_selection(self, step: int) -> None:
+        count = self._matches.get_n_items()
+        if count == 0:
+            return
+        position = self._selection.get_selected()
+        if position == Gtk.INVALID_LIST_POSITION:
+            position = 0
+        else:
+            position = min(max(position + step, 0), count - 1)
+        self._selection.set_selected(position)
+        self._list_view.scroll_to(position, Gtk.ListScrollFlags.NONE, None)
+
+    def __play_selected(self) -> None:
+        match = self._selection.get_selected_item()
+        if match is not None and self._track_list.visible:
+            RESULT_ROWS[self._shown_mode].play_item(match.item)
+
     def __update_mode_labels(self) -> None:
         for i, label in enumerate(self._mode_labels):
             label.css_classes = [
@@ -312,10 +456,20 @@ class MusicLauncher(widgets.Window):
             ]
 
     def __on_accept(self, *args) -> None:
-        if len(self._track_list.child) > 0:
-            self._track_list.child[0].play()
+        # Results for the latest text may still be on their way
+        if self._search_task is not None and not self._search_task.done():
+            self.__search(delay=0, accept=True)
+        else:
+            self.__play_selected()
+
+    def __search(
+        self, *args, delay: float = SEARCH_DEBOUNCE, accept: bool = False
+    ) -> None:
+        # A newer query replaces any search still waiting or running
+        if self._search_task is not None:
+            self._search_task.cancel()
+            self._search_task = None
 
-    def __search(self, *args) -> None:
         query = self._entry.text.lower()
         mode = SEARCH_MODES[self._mode_index]
 
@@ -324,45 +478,37 @@ class MusicLauncher(widgets.Window):
             self._track_list.visible = False
             return
 
-        items = self._data.get(mode, [])
-
-        if mode == "All Songs":
-            filtered = [
-                t for t in items
-                if query in t.lower() or query in _format_track_display(t).lower()
-            ]
-            if filtered:
-                self._track_list.child = [
-                    MusicTrackItem(t, _format_track_display(t))
-                    for t in filtered[:20]
-                ]
-            else:
-                self._track_list.child = [self.__no_results_label()]
-        elif mode == "Artists":
-            filtered = [a for a in items if query in a.lower()]
-            if filtered:
-                self._track_list.child = [
-                    MusicArtistItem(a) for a in filtered[:20]
-                ]
-            else:
-                self._track_list.child = [self.__no_results_label()]
-        elif mode == "Albums":
-            filtered = [a for a in items if query in a.lower()]
-            if filtered:
-                self._track_list.child = [
-                    MusicAlbumItem(a) for a in filtered[:20]
-                ]
-            else:
-                self._track_list.child = [self.__no_results_label()]
-        elif mode == "Playlists":
-            filtered = [p for p in items if query in p.lower()]
-            if filtered:
-                self._track_list.child = [
-                    MusicPlaylistItem(p) for p in filtered[:20]
-                ]
-            else:
-                self._track_list.child = [self.__no_results_label()]
+        self._search_task = asyncio.create_task(
+            self.__run_search(query, mode, delay, accept)
+        )
 
+    async def __run_search(
+        self, query: str, mode: str, delay: float, accept: bool
+    ) -> None:
+        await asyncio.sleep(delay)
+        # Shielded so a cancelled search doesn't abort the shared build;
+        # a cancelled search thread still finishes, its result is dropped
+        index = await asyncio.shield(self.__index(mode))
+        matches = await asyncio.to_thread(index.search, query)
+        self.__show_results(index, mode, matches)
+        if accept:
+            self.__play_selected()
+
+    def __show_results(self, index: SearchIndex, mode: str, matches: list[int]) -> None:
+        if mode != self._shown_mode:
+            self._list_view.set_factory(self._factories[mode])
+            self._shown_mode = mode
+        self._matches.set_matches(index, matches)
+
+        count = len(matches)
+        self._match_count.label = f"{count:,} match" + ("" if count == 1 else "es")
+        self._match_count.visible = count > 0
+        self._scroll.visible = count > 0
+        self._no_results.visible = count == 0
+        if count > 0:
+            # Enter plays the best match until the selection is moved
+            self._selection.set_selected(0)
+            self._list_view.scroll_to(0, Gtk.ListScrollFlags.NONE, None)
         self._track_list.visible = True
 
     def __no_results_label(self) -> widgets.Label:
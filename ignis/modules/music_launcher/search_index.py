@@ -0,0 +1,220 @@
+"""Prebuilt search index for the music launcher.
+
+Display strings are formatted and lowercased once when the index is
+built. Every word in them points back to the entries it appears in, so a
+query only scores entries that contain a matching word for each query
+term. Candidates are ranked with an fzf-style scorer that rewards
+matches at word starts and consecutive characters and penalises gaps.
+"""
+
+import re
+from array import array
+from bisect import bisect_left, bisect_right
+from itertools import islice
+from typing import Callable
+
+WORD_RE = re.compile(r"[^\W_]+")
+
+# fzf's scoring scheme, simplified
+SCORE_MATCH = 16
+BONUS_BOUNDARY = 8
+BONUS_CONSECUTIVE = 4
+# Not in fzf: prefer "pink" matching "Pink" over "Pinkerton"
+BONUS_WORD_END = 4
+BONUS_FIRST_CHAR_MULTIPLIER = 2
+PENALTY_GAP_START = 3
+PENALTY_GAP_EXTENSION = 1
+# Per matched character, for terms found only outside the display string
+PENALTY_PATH_MATCH = SCORE_MATCH // 2
+# Contiguous occurrences tried per term before settling on the best one
+MAX_OCCURRENCES = 4
+# Split points tried, nearest the middle first, for a term that runs
+# across two words
+MAX_SPLITS = 3
+# Broad queries score only this many candidates, shortest entries first;
+# the rest follow unscored in library order
+MAX_SCORED = 500
+
+
+def _bonus(haystack: str, pos: int) -> int:
+    if pos == 0 or not haystack[pos - 1].isalnum():
+        return BONUS_BOUNDARY
+    return 0
+
+
+def _score_positions(haystack: str, positions) -> int:
+    score = 0
+    previous = None
+    for i, pos in enumerate(positions):
+        bonus = _bonus(haystack, pos)
+        if i == 0:
+            bonus *= BONUS_FIRST_CHAR_MULTIPLIER
+        elif pos == previous + 1:
+            bonus = max(bonus, BONUS_CONSECUTIVE)
+        else:
+            gap = pos - previous - 1
+            score -= PENALTY_GAP_START + PENALTY_GAP_EXTENSION * (gap - 1)
+        score += SCORE_MATCH + bonus
+        previous = pos
+    if previous + 1 == len(haystack) or not haystack[previous + 1].isalnum():
+        score += BONUS_WORD_END
+    return score
+
+
+def score_term(haystack: str, term: str) -> int | None:
+    """Score `term` against a lowercased `haystack`, None if it doesn't match."""
+    # Take a contiguous occurrence when there is one, checking a few so
+    # one at a word start wins
+    start = haystack.find(term)
+    if start >= 0:
+        best = None
+        for _ in range(MAX_OCCURRENCES):
+            score = _score_positions(haystack, range(start, start + len(term)))
+            best = score if best is None else max(best, score)
+            start = haystack.find(term, start + 1)
+            if start < 0:
+                break
+        return best
+
+    # Forward scan for the first complete match, then back from its end
+    # to the tightest start, like fzf's v1 algorithm
+    pos = -1
+    for char in term:
+        pos = haystack.find(char, pos + 1)
+        if pos < 0:
+            return None
+    start = pos
+    for char in reversed(term[:-1]):
+        start = haystack.rfind(char, 0, start)
+
+    positions = []
+    pos = start - 1
+    for char in term:
+        pos = haystack.find(char, pos + 1)
+        positions.append(pos)
+    return _score_positions(haystack, positions)
+
+
+class SearchIndex:
+    def __init__(
+        self, items: list[str], display: Callable[[str], str] | None = None
+    ) -> None:
+        self.items = items
+        self.displays = [display(i) for i in items] if display else items
+        self._labels = [d.lower() for d in self.displays]
+        # Entries are also found by words only in the item itself, like
+        # the album directory of a track, but rank below display matches
+        self._paths = [i.lower() for i in items] if display else self._labels
+
+        postings: dict[str, array] = {}
+        for index, (label, path) in enumerate(zip(self._labels, self._paths)):
+            words = WORD_RE.findall(label)
+            if path is not label:
+                words += WORD_RE.findall(path)
+            for word in set(words):
+                ids = postings.get(word)
+                if ids is None:
+                    ids = postings[word] = array("I")
+                ids.append(index)
+        self._postings = postings
+        self._words = sorted(postings)
+        self._vocabulary = "\n".join(self._words)
+        self._characters = set(self._vocabulary)
+        self._word_starts = [0]
+        for word in self._words[:-1]:
+            self._word_starts.append(self._word_starts[-1] + len(word) + 1)
+        self._by_length = sorted(range(len(items)), key=lambda i: len(self._labels[i]))
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def __prefixed_words(self, prefix: str) -> list[str]:
+        start = bisect_left(self._words, prefix)
+        end = bisect_left(self._words, prefix + "\U0010ffff", start)
+        return self._words[start:end]
+
+    def __matching_words(self, term: str) -> list[str]:
+        # Single characters only match word starts, like typing an initial
+        if len(term) == 1:
+            return self.__prefixed_words(term)
+
+        # One scan of the joined vocabulary; hits map back to their words
+        positions = dict.fromkeys(
+            bisect_right(self._word_starts, match.start()) - 1
+            for match in re.finditer(re.escape(term), self._vocabulary)
+        )
+        if positions:
+            return [self._words[i] for i in positions]
+        if not self._characters.issuperset(term):
+            return []
+        # In-word subsequence; each class stops at the next wanted character,
+        # so the leftmost match is found without backtracking
+        pattern = "".join(f"[^{re.escape(c)}\n]*{re.escape(c)}" for c in term)
+        return re.findall(rf"(?m)^{pattern}.*$", self._vocabulary)
+
+    def __term_candidates(self, term: str) -> set[int]:
+        ids = set()
+        for word in self.__matching_words(term):
+            ids.update(self._postings[word])
+        if ids or len(term) < 4:
+            return ids
+
+        # A term running across words (e.g. "pinkfl") matches no single
+        # word; try it as the starts of two words, split near the middle
+        middle = len(term) // 2
+        splits = sorted(range(2, len(term) - 1), key=lambda i: abs(i - middle))
+        for split in splits[:MAX_SPLITS]:
+            head = set()
+            for word in self.__prefixed_words(term[:split]):
+                head.update(self._postings[word])
+            if head:
+                for word in self.__prefixed_words(term[split:]):
+                    ids.update(head.intersection(self._postings[word]))
+        return ids
+
+    def __candidates(self, terms: list[str]) -> set[int]:
+        candidates = None
+        # Longer terms match fewer words, so the intersection shrinks fast
+        for term in sorted(terms, key=len, reverse=True):
+            ids = self.__term_candidates(term)
+            candidates = ids if candidates is None else candidates & ids
+            if not candidates:
+                break
+        return candidates
+
+    def __score(self, index: int, terms: list[str]) -> int | None:
+        label = self._labels[index]
+        path = self._paths[index]
+        total = 0
+        for term in terms:
+            score = score_term(label, term)
+            if score is None and path is not label:
+                score = score_term(path, term)
+                if score is not None:
+                    score -= PENALTY_PATH_MATCH * len(term)
+            if score is None:
+                return None
+            total += score
+        return total
+
+    def search(self, query: str) -> list[int]:
+        """Return indexes into `items` matching `query`, best first."""
+        terms = WORD_RE.findall(query.lower())
+        if not terms:
+            return []
+
+        candidates = self.__candidates(terms)
+        if len(candidates) > MAX_SCORED:
+            shortest = (i for i in self._by_length if i in candidates)
+            scored = list(islice(shortest, MAX_SCORED))
+            rest = sorted(candidates.difference(scored))
+        else:
+            scored, rest = candidates, []
+
+        ranked = []
+        for index in scored:
+            score = self.__score(index, terms)
+            if score is not None:
+                ranked.append((-score, len(self._labels[index]), index))
+        ranked.sort()
+        return [index for _, _, index in ranked] + rest
@@ -0,0 +1,113 @@
+"""Cached index of the MPD music library.
+
+Keeps one connection to MPD, loads songs, artists, albums and stored
+playlists once, then waits in MPD's idle command and reloads only the
+lists a database or stored_playlist change affects. Widgets read the
+lists directly and watch `revision` to learn about reloads. Nothing
+connects until the first widget that needs the library calls `start()`.
+"""
+
+import asyncio
+import os
+from ignis.variable import Variable
+
+
+MPD_HOST = os.environ.get("MPD_HOST", "localhost")
+MPD_PORT = int(os.environ.get("MPD_PORT", "6600"))
+MPD_RECONNECT_DELAY = 5
+# Yield to the main loop this often while reading long responses
+MPD_LINES_PER_YIELD = 5000
+
+
+class MpdError(Exception):
+    pass
+
+
+class MpdLibraryService:
+    def __init__(self) -> None:
+        self.tracks: list[str] = []
+        self.artists: list[str] = []
+        self.albums: list[str] = []
+        self.playlists: list[str] = []
+        self.revision = Variable(0)
+
+        self._reader: asyncio.StreamReader | None = None
+        self._writer: asyncio.StreamWriter | None = None
+        self._task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def _connect(self) -> None:
+        # MPD_HOST may be "password@host" or a socket path, like for mpc
+        password, _, host = MPD_HOST.rpartition("@")
+        if host.startswith("/"):
+            self._reader, self._writer = await asyncio.open_unix_connection(
+                host, limit=1 << 20
+            )
+        else:
+            self._reader, self._writer = await asyncio.open_connection(
+                host, MPD_PORT, limit=1 << 20
+            )
+
+        greeting = await self._reader.readline()
+        if not greeting.startswith(b"OK MPD"):
+            raise MpdError(f"unexpected greeting {greeting!r}")
+        if password:
+            await self._command(f"password {password}")
+
+    def _close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+        self._reader = self._writer = None
+
+    async def _command(self, command: str) -> list[tuple[str, str]]:
+        self._writer.write(f"{command}\n".encode())
+        await self._writer.drain()
+
+        pairs = []
+        while True:
+            line = await self._reader.readline()
+            if not line:
+                raise ConnectionError("MPD closed the connection")
+            line = line.decode(errors="replace").rstrip("\n")
+            if line == "OK":
+                return pairs
+            if line.startswith("ACK"):
+                raise MpdError(line)
+            key, _, value = line.partition(": ")
+            pairs.append((key, value))
+            if len(pairs) % MPD_LINES_PER_YIELD == 0:
+                await asyncio.sleep(0)
+
+    async def _values(self, command: str, key: str) -> list[str]:
+        return [value for k, value in await self._command(command) if k == key]
+
+    async def _load(self, changed: set[str]) -> None:
+        if "database" in changed:
+            self.tracks = await self._values("listall", "file")
+            self.artists = await self._values("list artist", "Artist")
+            self.albums = await self._values("list album", "Album")
+        if "stored_playlist" in changed:
+            self.playlists = await self._values("listplaylists", "playlist")
+        self.revision.value = self.revision.value + 1
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self._connect()
+                await self._load({"database", "stored_playlist"})
+                while True:
+                    pairs = await self._command("idle database stored_playlist")
+                    changed = {value for key, value in pairs if key == "changed"}
+                    if changed:
+                        await self._load(changed)
+            except (OSError, EOFError, ValueError, MpdError) as exc:
+                print(f"mpd_library: {exc}; reconnecting in {MPD_RECONNECT_DELAY}s")
+            finally:
+                self._close()
+            await asyncio.sleep(MPD_RECONNECT_DELAY)
+
+
+mpd_library_service = MpdLibraryService()
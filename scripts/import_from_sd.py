@@ -8,11 +8,45 @@ import os
 import subprocess
 import argparse
 import platform
+import queue
 import re
 import json
-from datetime import datetime, timedelta
+import bisect
+import hashlib
+import heapq
+import io
+import math
+import shlex
+import shutil
+import socket
+import sqlite3
+import stat
+import struct
+import sys
+import tarfile
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timezone
 from pathlib import Path
-from collections import Counter
+from collections import Counter, defaultdict, namedtuple
+
+try:
+    import blake3
+except ImportError:
+    blake3 = None
+
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:
+    Image = None
 
 # Supported media file extensions
 MEDIA_EXTS = {
@@ -29,6 +63,232 @@ MEDIA_EXTS = {
     ".rw2",
 }
 
+# Where each format keeps its capture time
+TIFF_EXTS = {".cr2", ".nef", ".orf", ".rw2"}
+JPEG_EXTS = {".jpg", ".jpeg"}
+HEIF_EXTS = {".heic"}
+QUICKTIME_EXTS = {".mp4", ".mov"}
+
+# EXIF tags
+TAG_SUBIFDS = 0x014A
+TAG_COMPRESSION = 0x0103
+TAG_STRIP_OFFSETS = 0x0111
+TAG_STRIP_BYTE_COUNTS = 0x0117
+TAG_JPEG_OFFSET = 0x0201
+TAG_JPEG_LENGTH = 0x0202
+TAG_RW2_JPEG = 0x002E
+TAG_MAKE = 0x010F
+TAG_MODEL = 0x0110
+TAG_DATETIME = 0x0132
+TAG_EXIF_IFD = 0x8769
+TAG_GPS_IFD = 0x8825
+TAG_DATETIME_ORIGINAL = 0x9003
+TAG_OFFSET_TIME_ORIGINAL = 0x9011
+
+# GPS IFD tags
+GPS_LATITUDE_REF = 0x0001
+GPS_LATITUDE = 0x0002
+GPS_LONGITUDE_REF = 0x0003
+GPS_LONGITUDE = 0x0004
+GPS_TIME_STAMP = 0x0007
+GPS_DATE_STAMP = 0x001D
+
+# QuickTime times count seconds from 1904-01-01 UTC
+QUICKTIME_EPOCH_OFFSET = 2082844800
+
+METADATA_WORKERS = 16
+
+# Trip clustering
+# A new trip starts after this long without photos even within
+# --threshold-days, if the location also jumped by more than GPS_SPLIT_KM
+GPS_SPLIT_MIN_GAP = 24 * 3600
+GPS_SPLIT_KM = 200
+# Cameras whose clock differs from the reference device by a consistent
+# amount (wrong time zone, drift) are shifted to match it
+CLOCK_MATCH_WINDOW = 14 * 3600  # Max offset searched for; covers time zones
+CLOCK_MATCH_TOLERANCE = 10 * 60  # Matches this close to the median agree
+CLOCK_MIN_MATCHES = 5
+CLOCK_SAMPLE = 200  # Bounds the voting work per device
+CLOCK_MIN_SKEW = 2 * 60  # Smaller skews are left alone
+CLOCK_MIN_LEAD = 1.5  # Winning shift needs this many times the runner-up's votes
+
+# What a file's metadata says about when and where it was captured.
+# epoch is absolute (UTC) unless `local` is set: then the camera only gave
+# wall-clock time (`local`, as seconds since the epoch in an unknown zone)
+# and epoch is a guess using this machine's time zone.
+Capture = namedtuple(
+    "Capture", "epoch local offset device lat lon", defaults=(None,) * 5
+)
+
+# Transfer
+TRANSFER_STREAMS = 4  # Concurrent rsync workers, each with its own SSH session
+TRANSFER_RETRIES = 3  # Extra attempts per worker; --partial resumes where it stopped
+TRANSFER_RETRY_DELAY = 5
+# A cheap AEAD cipher and no compression: media doesn't compress, and the
+# cipher is what caps a single SSH stream
+RSYNC_SSH = "ssh -T -c aes128-gcm@openssh.com -o Compression=no"
+PROGRESS_INTERVAL = 1.0
+
+# Content hashing for dedup: local hasher and the remote command that prints
+# the same digest, fastest first. blake2b needs only hashlib and coreutils.
+HASH_ALGORITHMS = {
+    "blake3": (blake3.blake3 if blake3 else None, "b3sum"),
+    "xxh128": (xxhash.xxh3_128 if xxhash else None, "xxh128sum"),
+    "blake2b": (hashlib.blake2b, "b2sum"),
+}
+HASH_CHUNK_SIZE = 1024 * 1024
+HASH_WORKERS = 4
+
+# Previews, written next to the media in each trip directory
+PREVIEW_DIR_NAME = ".previews"  # Hidden, so Plex doesn't list them as photos
+PREVIEW_SIZE = 1024
+PREVIEW_QUALITY = 80
+CONTACT_TILE = 200
+CONTACT_COLUMNS = 8
+CONTACT_PER_SHEET = 64
+
+# Chunks in flight between pipeline stages (read -> hash -> write)
+PIPELINE_DEPTH = 32
+
+# Structured progress events (JSON lines) and the per-run history
+PROGRESS_EVENT_INTERVAL = 1.0  # Min seconds between progress events per stage
+HISTORY_PATH = (
+    Path(os.environ.get("XDG_STATE_HOME", Path.home() / ".local" / "state"))
+    / "import_from_sd"
+    / "runs.jsonl"
+)
+
+# Record of files already imported, per card
+MANIFEST_PATH = (
+    Path(os.environ.get("XDG_STATE_HOME", Path.home() / ".local" / "state"))
+    / "import_from_sd"
+    / "manifest.sqlite3"
+)
+
+
+class ProgressEvents:
+    """Machine-readable progress as JSON lines, for bars and notifications.
+
+    Each line has "event" (stage_start, progress, stage_end or summary),
+    "run", "ts" and event fields. Outputs are added with open(): a Unix
+    socket someone is listening on, or a file to append to. Nothing is
+    written until an output is opened, except the summary, which always
+    goes to the run history.
+    """
+
+    def __init__(self):
+        self.run = datetime.now().strftime("%Y%m%dT%H%M%S")
+        self.started = time.monotonic()
+        self.outputs = []
+        self.stages = {}
+        self.lock = threading.Lock()
+        self._stage_started = {}
+        self._stage_fields = {}
+        self._last_progress = {}
+
+    def open(self, target):
+        try:
+            if os.path.exists(target) and stat.S_ISSOCK(os.stat(target).st_mode):
+                sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                try:
+                    sock.connect(target)
+                except OSError:
+                    sock.close()
+                    raise
+                self.outputs.append(sock.makefile("w", buffering=1))
+            else:
+                self.outputs.append(open(target, "a", buffering=1))
+        except OSError as e:
+            # Progress events are optional; a stale socket mustn't stop an import
+            print(f"Not sending progress events to {target}: {e}")
+
+    def emit(self, event, **fields):
+        line = json.dumps(
+            {"event": event, "run": self.run, "ts": round(time.time(), 3), **fields}
+        )
+        with self.lock:
+            for output in list(self.outputs):
+                try:
+                    output.write(line + "\n")
+                except OSError:
+                    # The listener went away; keep importing without it
+                    self.outputs.remove(output)
+        return line
+
+    @contextmanager
+    def stage(self, name, **fields):
+        """Time a stage; the caller fills in "files" and "bytes" on the dict."""
+        counts = {"files": 0, "bytes": 0}
+        self._stage_started[name] = started = time.monotonic()
+        self._stage_fields[name] = fields
+        self.emit("stage_start", stage=name, **fields)
+        try:
+            yield counts
+        finally:
+            seconds = max(time.monotonic() - started, 1e-6)
+            result = {
+                **counts,
+                "seconds": round(seconds, 3),
+                "files_per_sec": round(counts["files"] / seconds, 1),
+                "bytes_per_sec": round(counts["bytes"] / seconds),
+            }
+            self.stages[name] = result
+            self.emit("stage_end", stage=name, **result)
+
+    def progress(self, stage, files, bytes_done, total_files=None, total_bytes=None):
+        now = time.monotonic()
+        if now - self._last_progress.get(stage, 0) < PROGRESS_EVENT_INTERVAL:
+            return
+        self._last_progress[stage] = now
+        elapsed = max(now - self._stage_started.get(stage, self.started), 1e-6)
+        # Totals given when the stage started apply to its progress events
+        stage_fields = self._stage_fields.get(stage, {})
+        if total_files is None:
+            total_files = stage_fields.get("total_files")
+        if total_bytes is None:
+            total_bytes = stage_fields.get("total_bytes")
+        rate = bytes_done / elapsed
+        fields = {
+            "files": files,
+            "bytes": bytes_done,
+            "bytes_per_sec": round(rate),
+            "files_per_sec": round(files / elapsed, 1),
+        }
+        if total_files is not None:
+            fields["total_files"] = total_files
+        if total_bytes is not None:
+            fields["total_bytes"] = total_bytes
+            fields["bytes_left"] = max(total_bytes - bytes_done, 0)
+            if rate > 0:
+                fields["eta_sec"] = round(fields["bytes_left"] / rate)
+        self.emit("progress", stage=stage, **fields)
+
+    def summary(self, status, history=HISTORY_PATH, **fields):
+        line = self.emit(
+            "summary",
+            status=status,
+            seconds=round(time.monotonic() - self.started, 3),
+            stages=self.stages,
+            **fields,
+        )
+        try:
+            Path(history).parent.mkdir(parents=True, exist_ok=True)
+            with open(history, "a") as f:
+                f.write(line + "\n")
+        except OSError as e:
+            print(f"Could not write run history: {e}")
+
+    def close(self):
+        for output in self.outputs:
+            try:
+                output.close()
+            except OSError:
+                pass
+        self.outputs = []
+
+
+events = ProgressEvents()
+
 
 def detect_sd_cards():
     """Detect SD cards on Linux and Mac systems."""
@@ -204,6 +464,13 @@ def select_sd_card(candidates):
             return None
 
 
+def positive_int(value):
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {value}")
+    return number
+
+
 def parse_args():
     parser = argparse.ArgumentParser(
         description="Import SD card, group media by trip, and rsync to remote."
@@ -233,14 +500,88 @@ def parse_args():
         default=2,
         help="Day gap threshold to start a new trip",
     )
+    parser.add_argument(
+        "--gps-split-km",
+        type=float,
+        default=GPS_SPLIT_KM,
+        help="Also start a new trip after a day-long gap if the location "
+        "moved this far (0 disables)",
+    )
+    parser.add_argument(
+        "--workers",
+        type=positive_int,
+        default=METADATA_WORKERS,
+        help="Parallel readers for capture-time metadata",
+    )
+    parser.add_argument(
+        "--streams",
+        type=positive_int,
+        default=TRANSFER_STREAMS,
+        help="Concurrent rsync streams, balanced by bytes",
+    )
+    parser.add_argument(
+        "--copy",
+        action="store_true",
+        help="Leave the card untouched: copy files straight into the trip "
+        "layout and verify checksums, instead of renaming on the card and "
+        "running rsync",
+    )
+    parser.add_argument(
+        "--local-dest",
+        help="With --copy, copy into this local directory (SSD staging or a "
+        "NAS mount) instead of the remote host",
+    )
+    parser.add_argument(
+        "--previews",
+        action="store_true",
+        help=f"Write previews and contact sheets to {PREVIEW_DIR_NAME}/ in each "
+        "trip directory (needs Pillow; pillow-heif for HEIC, ffmpeg for video)",
+    )
+    parser.add_argument(
+        "--preview-format",
+        choices=["jpg", "webp"],
+        default="jpg",
+        help="Image format for previews and contact sheets",
+    )
+    parser.add_argument(
+        "--dedup",
+        action="store_true",
+        help="Skip files whose content is already in --remote-dir (the first "
+        "run hashes the whole remote library; later runs only new files)",
+    )
+    parser.add_argument(
+        "--hash",
+        choices=["auto", *HASH_ALGORITHMS],
+        default="auto",
+        help="Content hash for --dedup; auto picks the fastest available",
+    )
+    parser.add_argument(
+        "--events",
+        help="Write JSON-lines progress events to this file, or to this Unix "
+        "socket if one is listening. A summary of every run is also appended "
+        f"to {HISTORY_PATH}",
+    )
+    parser.add_argument(
+        "--manifest",
+        default=str(MANIFEST_PATH),
+        help="SQLite file recording what has already been imported",
+    )
+    parser.add_argument(
+        "--reimport",
+        action="store_true",
+        help="Ignore the manifest and import every file on the card",
+    )
     return parser.parse_args()
 
 
-def mount_sd(device, mount_point):
+def mount_sd(device, mount_point, read_only=False):
     if not mount_point.exists():
         subprocess.run(["sudo", "mkdir", "-p", str(mount_point)], check=True)
     if not os.path.ismount(str(mount_point)):
-        subprocess.run(["sudo", "mount", device, str(mount_point)], check=True)
+        options = ["-o", "ro"] if read_only else []
+        subprocess.run(
+            ["sudo", "mount", *options, device, str(mount_point)], check=True
+        )
 
 
 def unmount_sd(mount_point):
@@ -248,47 +589,749 @@ def unmount_sd(mount_point):
         subprocess.run(["sudo", "umount", str(mount_point)], check=True)
 
 
-def get_timestamp(file_path):
-    # Currently using filesystem modification time;
-    # could be extended to use EXIF for images.
-    return datetime.fromtimestamp(file_path.stat().st_mtime)
+def read_tiff_header(f, base):
+    """Byte order and first IFD offset of a TIFF structure, or None."""
+    f.seek(base)
+    header = f.read(8)
+    if len(header) < 8 or header[:2] not in (b"II", b"MM"):
+        return None
+    # ORF and RW2 use their own magic numbers but the same layout
+    endian = "<" if header[:2] == b"II" else ">"
+    (ifd_offset,) = struct.unpack(endian + "I", header[4:8])
+    return endian, ifd_offset
 
 
-def group_media_files(mount_point, threshold_days):
-    # Recursively gather media files
-    files = [
-        p
-        for p in mount_point.rglob("*")
-        if p.is_file() and p.suffix.lower() in MEDIA_EXTS
-    ]
-    if not files:
+def read_ifd(f, base, endian, offset):
+    """Entries of one IFD as {tag: (type, count, value, raw)}, and the next offset."""
+    f.seek(base + offset)
+    raw = f.read(2)
+    if len(raw) < 2:
+        return {}, 0
+    (count,) = struct.unpack(endian + "H", raw)
+    entries = f.read(12 * count)
+    tags = {}
+    for i in range(len(entries) // 12):
+        tag, typ, n, value = struct.unpack(
+            endian + "HHII", entries[i * 12 : i * 12 + 12]
+        )
+        tags[tag] = (typ, n, value, entries[i * 12 + 8 : i * 12 + 12])
+    next_raw = f.read(4)
+    next_offset = struct.unpack(endian + "I", next_raw)[0] if len(next_raw) == 4 else 0
+    return tags, next_offset
+
+
+def ifd_int(entry, endian):
+    """First value of a SHORT or LONG entry."""
+    typ, _, value, raw = entry
+    if typ == 3:
+        return struct.unpack(endian + "H", raw[:2])[0]
+    return value
+
+
+def read_tiff_tags(f, base):
+    """Read capture details from a TIFF structure starting at `base`.
+
+    Looks at IFD0, the Exif IFD and the GPS IFD. Only the directory entries
+    and the values we look up are read, so this costs a few small reads no
+    matter how big the file is.
+    """
+    header = read_tiff_header(f, base)
+    if header is None:
+        return {}
+    endian, ifd_offset = header
+
+    def read_ascii(entry):
+        typ, n, value, inline = entry
+        if typ != 2:
+            return None
+        if n <= 4:
+            data = inline[:n]
+        else:
+            f.seek(base + value)
+            data = f.read(n)
+        return data.split(b"\0", 1)[0].decode("ascii", "replace").strip()
+
+    def read_rationals(entry):
+        typ, n, value, _ = entry
+        if typ not in (5, 10) or n > 8:
+            return None
+        f.seek(base + value)
+        raw = struct.unpack(f"{endian}{2 * n}I", f.read(8 * n))
+        return [num / den if den else 0.0 for num, den in zip(raw[::2], raw[1::2])]
+
+    def read_coordinate(tags, value_tag, ref_tag, negative):
+        if value_tag not in tags or ref_tag not in tags:
+            return None
+        parts = read_rationals(tags[value_tag])
+        if not parts or len(parts) < 3:
+            return None
+        degrees = parts[0] + parts[1] / 60 + parts[2] / 3600
+        return -degrees if read_ascii(tags[ref_tag]) == negative else degrees
+
+    ifd0, _ = read_ifd(f, base, endian, ifd_offset)
+    exif = (
+        read_ifd(f, base, endian, ifd0[TAG_EXIF_IFD][2])[0]
+        if TAG_EXIF_IFD in ifd0
+        else {}
+    )
+    info = {}
+    for key, tag in (
+        ("make", TAG_MAKE),
+        ("model", TAG_MODEL),
+        ("datetime", TAG_DATETIME),
+        ("datetime_original", TAG_DATETIME_ORIGINAL),
+        ("offset", TAG_OFFSET_TIME_ORIGINAL),
+    ):
+        entry = exif.get(tag) or ifd0.get(tag)
+        if entry is not None:
+            info[key] = read_ascii(entry)
+
+    if TAG_GPS_IFD in ifd0:
+        gps, _ = read_ifd(f, base, endian, ifd0[TAG_GPS_IFD][2])
+        info["lat"] = read_coordinate(gps, GPS_LATITUDE, GPS_LATITUDE_REF, "S")
+        info["lon"] = read_coordinate(gps, GPS_LONGITUDE, GPS_LONGITUDE_REF, "W")
+        if GPS_DATE_STAMP in gps and GPS_TIME_STAMP in gps:
+            info["gps_date"] = read_ascii(gps[GPS_DATE_STAMP])
+            info["gps_time"] = read_rationals(gps[GPS_TIME_STAMP])
+    return info
+
+
+def embedded_jpeg(f):
+    """Largest JPEG preview embedded in a TIFF-based raw file, as bytes.
+
+    Cameras store previews as JPEGInterchangeFormat (most), single-strip
+    old-style JPEG (CR2 IFD0) or JpgFromRaw (RW2), in IFD0, its chain or
+    SubIFDs.
+    """
+    header = read_tiff_header(f, 0)
+    if header is None:
+        return None
+    endian, first = header
+    pending = [first]
+    visited = set()
+    best = (0, 0)
+    while pending and len(visited) < 16:
+        offset = pending.pop()
+        if offset == 0 or offset in visited:
+            continue
+        visited.add(offset)
+        tags, next_offset = read_ifd(f, 0, endian, offset)
+        pending.append(next_offset)
+        if TAG_SUBIFDS in tags:
+            _, n, value, raw = tags[TAG_SUBIFDS]
+            if n == 1:
+                pending.append(value)
+            else:
+                f.seek(value)
+                pending.extend(struct.unpack(f"{endian}{n}I", f.read(4 * n)))
+        candidates = []
+        if TAG_JPEG_OFFSET in tags and TAG_JPEG_LENGTH in tags:
+            candidates.append((tags[TAG_JPEG_OFFSET][2], tags[TAG_JPEG_LENGTH][2]))
+        if (
+            TAG_COMPRESSION in tags
+            and ifd_int(tags[TAG_COMPRESSION], endian) == 6
+            and TAG_STRIP_OFFSETS in tags
+            and TAG_STRIP_BYTE_COUNTS in tags
+            and tags[TAG_STRIP_OFFSETS][1] == 1
+        ):
+            candidates.append(
+                (
+                    ifd_int(tags[TAG_STRIP_OFFSETS], endian),
+                    ifd_int(tags[TAG_STRIP_BYTE_COUNTS], endian),
+                )
+            )
+        if TAG_RW2_JPEG in tags:
+            candidates.append((tags[TAG_RW2_JPEG][2], tags[TAG_RW2_JPEG][1]))
+        for candidate in candidates:
+            if candidate[1] > best[1]:
+                best = candidate
+    if not best[1]:
+        return None
+    f.seek(best[0])
+    data = f.read(best[1])
+    return data if data.startswith(b"\xff\xd8") else None
+
+
+def parse_exif_datetime(tags):
+    value = tags.get("datetime_original") or tags.get("datetime")
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value[:19], "%Y:%m:%d %H:%M:%S")
+    except ValueError:
+        return None
+
+
+def parse_utc_offset(value):
+    """Seconds east of UTC from an OffsetTime value like "+02:00"."""
+    match = re.fullmatch(r"([+-])(\d{2}):(\d{2})", value or "")
+    if not match:
+        return None
+    seconds = int(match.group(2)) * 3600 + int(match.group(3)) * 60
+    return -seconds if match.group(1) == "-" else seconds
+
+
+def parse_gps_time(tags):
+    """UTC epoch of the GPS fix, or None."""
+    try:
+        day = datetime.strptime(tags["gps_date"], "%Y:%m:%d")
+        hours, minutes, seconds = tags["gps_time"]
+    except (KeyError, TypeError, ValueError):
+        return None
+    day = day.replace(tzinfo=timezone.utc).timestamp()
+    return day + hours * 3600 + minutes * 60 + seconds
+
+
+def exif_capture(tags, mtime):
+    """Capture from decoded EXIF tags; falls back to mtime for the time."""
+    device = " ".join(filter(None, (tags.get("make"), tags.get("model")))) or None
+    lat, lon = tags.get("lat"), tags.get("lon")
+    taken = parse_exif_datetime(tags)
+    if taken is None:
+        return Capture(mtime, device=device, lat=lat, lon=lon)
+
+    local = taken.replace(tzinfo=timezone.utc).timestamp()
+    offset = parse_utc_offset(tags.get("offset"))
+    gps_time = parse_gps_time(tags)
+    if offset is None and gps_time is not None and abs(local - gps_time) < 15 * 3600:
+        # The GPS clock is UTC; time zones are whole quarter hours
+        offset = round((local - gps_time) / 900) * 900
+    if offset is not None:
+        return Capture(local - offset, None, offset, device, lat, lon)
+    return Capture(taken.timestamp(), local, None, device, lat, lon)
+
+
+def jpeg_exif_offset(f):
+    """Offset of the TIFF header inside a JPEG's APP1 Exif segment."""
+    f.seek(0)
+    if f.read(2) != b"\xff\xd8":
+        return None
+    while True:
+        marker = f.read(4)
+        if len(marker) < 4 or marker[0] != 0xFF:
+            return None
+        kind = marker[1]
+        (length,) = struct.unpack(">H", marker[2:])
+        if kind == 0xDA:  # Start of scan: no more metadata segments
+            return None
+        segment = f.tell()
+        if kind == 0xE1 and f.read(6) == b"Exif\0\0":
+            return segment + 6
+        f.seek(segment + length - 2)
+
+
+def iter_boxes(f, start, end):
+    """Yield (type, payload_start, box_end) for ISO-BMFF boxes in a range."""
+    pos = start
+    while end is None or pos + 8 <= end:
+        f.seek(pos)
+        header = f.read(8)
+        if len(header) < 8:
+            return
+        size, kind = struct.unpack(">I4s", header)
+        payload = pos + 8
+        if size == 1:
+            (size,) = struct.unpack(">Q", f.read(8))
+            payload += 8
+        elif size == 0:
+            f.seek(0, os.SEEK_END)
+            size = f.tell() - pos
+        if size < payload - pos:
+            return
+        yield kind, payload, pos + size
+        pos += size
+
+
+def find_box(f, start, end, kind):
+    for box_kind, payload, box_end in iter_boxes(f, start, end):
+        if box_kind == kind:
+            return payload, box_end
+    return None
+
+
+def quicktime_capture(f, mtime):
+    """Capture from the movie header (moov/mvhd) and location of an MP4/MOV."""
+    moov = find_box(f, 0, None, b"moov")
+    if not moov:
+        return Capture(mtime)
+    epoch = mtime
+    mvhd = find_box(f, moov[0], moov[1], b"mvhd")
+    if mvhd:
+        f.seek(mvhd[0])
+        version = f.read(4)[0]
+        if version == 1:
+            (created,) = struct.unpack(">Q", f.read(8))
+        else:
+            (created,) = struct.unpack(">I", f.read(4))
+        if created > QUICKTIME_EPOCH_OFFSET:  # Zero when unset by the camera
+            epoch = created - QUICKTIME_EPOCH_OFFSET
+
+    # Phones store ISO 6709 location like "+37.7749-122.4194/" in udta/©xyz
+    lat = lon = None
+    udta = find_box(f, moov[0], moov[1], b"udta")
+    xyz = udta and find_box(f, udta[0], udta[1], b"\xa9xyz")
+    if xyz:
+        f.seek(xyz[0] + 4)
+        text = f.read(min(xyz[1] - xyz[0] - 4, 64)).decode("ascii", "replace")
+        match = re.match(r"([+-]\d+(?:\.\d+)?)([+-]\d+(?:\.\d+)?)", text)
+        if match:
+            lat, lon = float(match.group(1)), float(match.group(2))
+    return Capture(epoch, lat=lat, lon=lon)
+
+
+def heif_exif_offset(f):
+    """Offset of the TIFF header in a HEIC's Exif item (meta/iinf + iloc)."""
+    meta = find_box(f, 0, None, b"meta")
+    if not meta:
+        return None
+    start, end = meta[0] + 4, meta[1]  # Skip the full-box version/flags
+
+    iinf = find_box(f, start, end, b"iinf")
+    if not iinf:
+        return None
+    f.seek(iinf[0])
+    version = f.read(4)[0]
+    exif_id = None
+    first_entry = iinf[0] + (6 if version == 0 else 8)
+    for kind, payload, _ in iter_boxes(f, first_entry, iinf[1]):
+        if kind != b"infe":
+            continue
+        f.seek(payload)
+        infe_version = f.read(4)[0]
+        if infe_version < 2:
+            continue
+        id_format = ">H" if infe_version == 2 else ">I"
+        (item_id,) = struct.unpack(id_format, f.read(struct.calcsize(id_format)))
+        f.read(2)  # Protection index
+        if f.read(4) == b"Exif":
+            exif_id = item_id
+            break
+    if exif_id is None:
+        return None
+
+    iloc = find_box(f, start, end, b"iloc")
+    if not iloc:
+        return None
+    f.seek(iloc[0])
+    version = f.read(4)[0]
+    sizes = f.read(2)
+    offset_size, length_size = sizes[0] >> 4, sizes[0] & 0xF
+    base_offset_size, index_size = sizes[1] >> 4, sizes[1] & 0xF
+
+    def read_uint(size):
+        return int.from_bytes(f.read(size), "big") if size else 0
+
+    item_count = read_uint(2 if version < 2 else 4)
+    for _ in range(item_count):
+        item_id = read_uint(2 if version < 2 else 4)
+        if version in (1, 2):
+            read_uint(2)  # Construction method
+        read_uint(2)  # Data reference index
+        base_offset = read_uint(base_offset_size)
+        extents = []
+        for _ in range(read_uint(2)):
+            if version in (1, 2):
+                read_uint(index_size)
+            extents.append((read_uint(offset_size), read_uint(length_size)))
+        if item_id == exif_id and extents:
+            item_start = base_offset + extents[0][0]
+            f.seek(item_start)
+            # The item starts with the offset to the TIFF header
+            return item_start + 4 + read_uint(4)
+    return None
+
+
+def read_capture(file_path, mtime):
+    """Capture time, zone, device and location from the file's own metadata.
+
+    Copy tools and some cameras reset the filesystem modification time, so
+    it is only used when the file has no usable metadata.
+    """
+    ext = os.path.splitext(file_path)[1].lower()
+    try:
+        with open(file_path, "rb") as f:
+            if ext in QUICKTIME_EXTS:
+                return quicktime_capture(f, mtime)
+            if ext in JPEG_EXTS:
+                base = jpeg_exif_offset(f)
+            elif ext in HEIF_EXTS:
+                base = heif_exif_offset(f)
+            elif ext in TIFF_EXTS:
+                base = 0
+            else:
+                return Capture(mtime)
+            if base is None:
+                return Capture(mtime)
+            return exif_capture(read_tiff_tags(f, base), mtime)
+    except (OSError, struct.error, IndexError, ValueError, OverflowError):
+        return Capture(mtime)
+
+
+def get_volume_id(device, mount_point):
+    """Stable identifier of the card's filesystem (UUID or FAT serial)."""
+    try:
+        if platform.system() == "Darwin":
+            import plistlib
+
+            result = subprocess.run(
+                ["diskutil", "info", "-plist", str(mount_point)],
+                capture_output=True,
+                check=True,
+            )
+            volume_id = plistlib.loads(result.stdout).get("VolumeUUID")
+        else:
+            result = subprocess.run(
+                ["findmnt", "-n", "-o", "UUID", "--target", str(mount_point)],
+                capture_output=True,
+                text=True,
+                check=True,
+            )
+            volume_id = result.stdout.strip()
+    except (OSError, subprocess.CalledProcessError, ValueError):
+        volume_id = None
+    return volume_id or device
+
+
+class ImportManifest:
+    """SQLite record of files already imported and verified, per card volume.
+
+    Files are keyed by their path relative to the mount point plus size and
+    mtime, so a file that changed on the card is imported again.
+    """
+
+    def __init__(self, path=MANIFEST_PATH):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(path)
+        self.db.execute("""
+            CREATE TABLE IF NOT EXISTS imported (
+                volume TEXT NOT NULL,
+                path TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                trip TEXT,
+                imported_at TEXT NOT NULL,
+                PRIMARY KEY (volume, path)
+            )
+            """)
+        self.db.execute("""
+            CREATE TABLE IF NOT EXISTS remote_hashes (
+                location TEXT NOT NULL,
+                algorithm TEXT NOT NULL,
+                path TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                mtime TEXT NOT NULL,
+                hash TEXT NOT NULL,
+                PRIMARY KEY (location, algorithm, path)
+            )
+            """)
+
+    def known_files(self, volume):
+        rows = self.db.execute(
+            "SELECT path, size, mtime_ns FROM imported WHERE volume = ?", (volume,)
+        )
+        return {path: (size, mtime_ns) for path, size, mtime_ns in rows}
+
+    def record(self, volume, mount_point, files):
+        """Mark (path, trip) pairs as imported, with their current stat."""
+        now = datetime.now().isoformat(timespec="seconds")
+        rows = []
+        for fp, trip in files:
+            st = fp.stat()
+            rel = str(fp.relative_to(mount_point))
+            rows.append((volume, rel, st.st_size, st.st_mtime_ns, trip, now))
+        with self.db:
+            self.db.executemany(
+                "INSERT OR REPLACE INTO imported VALUES (?, ?, ?, ?, ?, ?)", rows
+            )
+
+    def remote_hashes(self, location, algorithm):
+        rows = self.db.execute(
+            "SELECT path, size, mtime, hash FROM remote_hashes "
+            "WHERE location = ? AND algorithm = ?",
+            (location, algorithm),
+        )
+        return {path: (size, mtime, digest) for path, size, mtime, digest in rows}
+
+    def update_remote_hashes(self, location, algorithm, rows, removed):
+        """Store (path, size, mtime, hash) rows and forget removed paths."""
+        with self.db:
+            self.db.executemany(
+                "INSERT OR REPLACE INTO remote_hashes VALUES (?, ?, ?, ?, ?, ?)",
+                [(location, algorithm, *row) for row in rows],
+            )
+            self.db.executemany(
+                "DELETE FROM remote_hashes "
+                "WHERE location = ? AND algorithm = ? AND path = ?",
+                [(location, algorithm, path) for path in removed],
+            )
+
+    def close(self):
+        self.db.close()
+
+
+def scan_media_files(root, known=None, stats=None):
+    """Yield (path, stat) for media files under root in a single pass.
+
+    The directory listing already says which entries are files, so each
+    media file is stat'ed exactly once. Files in `known` with the same size
+    and mtime are skipped.
+    """
+    known = known or {}
+    stack = [str(root)]
+    while stack:
+        try:
+            entries = os.scandir(stack.pop())
+        except OSError as e:
+            print(f"Skipping unreadable directory: {e}")
+            continue
+        with entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.name != PREVIEW_DIR_NAME:
+                        stack.append(entry.path)
+                    continue
+                if os.path.splitext(entry.name)[1].lower() not in MEDIA_EXTS:
+                    continue
+                if not entry.is_file():
+                    continue
+                st = entry.stat()
+                rel = os.path.relpath(entry.path, root)
+                if known.get(rel) == (st.st_size, st.st_mtime_ns):
+                    continue
+                if stats is not None:
+                    stats["files"] += 1
+                    stats["bytes"] += st.st_size
+                yield entry.path, st
+
+
+def group_media_files(
+    mount_point,
+    threshold_days,
+    workers=METADATA_WORKERS,
+    known=None,
+    gps_split_km=GPS_SPLIT_KM,
+):
+    stats = Counter()
+    started = time.monotonic()
+
+    def captured(record):
+        path, st = record
+        events.progress("scan", stats["files"], stats["bytes"])
+        return read_capture(path, st.st_mtime), path
+
+    # Gather (capture, path) records, leaving out files already imported.
+    # The pool reads capture-time headers while the scan is still walking
+    # the card.
+    with events.stage("scan") as counts:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            records = list(
+                pool.map(captured, scan_media_files(mount_point, known, stats))
+            )
+        counts.update(files=stats["files"], bytes=stats["bytes"])
+    elapsed = max(time.monotonic() - started, 1e-6)
+    print(
+        f"Scanned {stats['files']} file(s), {format_bytes(stats['bytes'])} "
+        f"in {elapsed:.1f}s ({stats['files'] / elapsed:.0f} files/s)"
+    )
+    if not records:
         return []
-    # Pair with timestamps and sort
-    files_ts = sorted([(get_timestamp(p), p) for p in files], key=lambda x: x[0])
-    threshold = timedelta(days=threshold_days)
+    return cluster_trips(records, threshold_days, gps_split_km)
+
+
+def distance_km(lat1, lon1, lat2, lon2):
+    """Great-circle distance (haversine)."""
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = (
+        math.sin((lat2 - lat1) / 2) ** 2
+        + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    )
+    return 12742 * math.asin(math.sqrt(a))
+
+
+def resolve_zones(records):
+    """Give wall-clock-only captures the UTC offset their device used nearby.
+
+    Each takes the offset of the same device's capture nearest to it in
+    wall-clock time, so shots from a trip abroad keep that trip's zone.
+    """
+    offsets = defaultdict(list)
+    for capture, _ in records:
+        if capture.offset is not None and capture.device:
+            offsets[capture.device].append(
+                (capture.epoch + capture.offset, capture.offset)
+            )
+    for values in offsets.values():
+        values.sort()
+    resolved = []
+    for capture, path in records:
+        values = offsets.get(capture.device)
+        if capture.local is not None and values:
+            i = bisect.bisect_left(values, (capture.local,))
+            nearest = min(
+                values[max(i - 1, 0) : i + 1],
+                key=lambda value: abs(value[0] - capture.local),
+            )
+            offset = nearest[1]
+            capture = capture._replace(
+                epoch=capture.local - offset, local=None, offset=offset
+            )
+        resolved.append((capture, path))
+    return resolved
+
+
+def count_matches(times, ref_times, shift):
+    """How many of `times`, shifted, land near some reference time."""
+    matches = 0
+    for t in times:
+        t -= shift
+        i = bisect.bisect_left(ref_times, t - CLOCK_MATCH_TOLERANCE)
+        if i < len(ref_times) and ref_times[i] <= t + CLOCK_MATCH_TOLERANCE:
+            matches += 1
+    return matches
+
+
+def estimate_clock_skews(records):
+    """Per-device clock error relative to the most trustworthy device.
+
+    The reference is the device with the most absolute timestamps. Only
+    devices with wall-clock times and no known UTC offset are corrected;
+    the others are already on the common clock. For each of those,
+    differences to reference captures within CLOCK_MATCH_WINDOW vote in
+    CLOCK_MATCH_TOLERANCE-wide bins. The winning shift is kept only if it
+    clearly beats every other shift, so devices that merely shot at
+    different times of day aren't moved, and if it lines up clearly more
+    captures than no shift.
+    Votes come from a bounded sample and matching uses bisect, so this is
+    O(n log n).
+    """
+    by_device = defaultdict(list)
+    for capture, _ in records:
+        if capture.device:
+            by_device[capture.device].append(capture)
+    if len(by_device) < 2:
+        return {}
+
+    reference = max(
+        by_device,
+        key=lambda d: (sum(c.local is None for c in by_device[d]), len(by_device[d])),
+    )
+    ref_times = sorted(c.epoch for c in by_device[reference])
+    skews = {}
+    for device, captures in by_device.items():
+        if device == reference or len(captures) < CLOCK_MIN_MATCHES:
+            continue
+        if any(c.offset is not None for c in captures):
+            continue
+        times = sorted(c.epoch for c in captures)
+        sample = times[:: max(1, len(times) // CLOCK_SAMPLE)]
+        votes = Counter()
+        for t in sample:
+            lo = bisect.bisect_left(ref_times, t - CLOCK_MATCH_WINDOW)
+            hi = bisect.bisect_right(ref_times, t + CLOCK_MATCH_WINDOW)
+            for ref in ref_times[lo : min(hi, lo + CLOCK_SAMPLE)]:
+                votes[round((t - ref) / CLOCK_MATCH_TOLERANCE)] += 1
+        if not votes:
+            continue
+        ranked = votes.most_common()
+        best, best_votes = ranked[0]
+        # Votes for one true skew can straddle a bin edge, so neighbours of
+        # the winning bin don't count as competition
+        runner_up = next((v for b, v in ranked[1:] if abs(b - best) > 1), 0)
+        if best_votes < CLOCK_MIN_LEAD * runner_up:
+            continue
+        skew = best * CLOCK_MATCH_TOLERANCE
+        if abs(skew) < CLOCK_MIN_SKEW:
+            continue
+        matched = count_matches(times, ref_times, skew)
+        if matched >= CLOCK_MIN_MATCHES and matched > 2 * count_matches(
+            times, ref_times, 0
+        ):
+            skews[device] = skew
+    return skews
+
+
+def cluster_trips(records, threshold_days, gps_split_km=GPS_SPLIT_KM):
+    """Group (Capture, path) records into trips.
+
+    Times are first put on one clock: UTC offsets come from the EXIF
+    offset tags or GPS time, and are reused for other photos from the same
+    device taken around the same time. Cameras with a wrong clock are then
+    shifted to match the reference device. A trip ends after a gap longer than threshold_days,
+    or a gap longer than GPS_SPLIT_MIN_GAP with a location jump over
+    gps_split_km. Sorting dominates, so this stays O(n log n).
+
+    Returns trips as lists of (Path, local capture datetime).
+    """
+    records = resolve_zones(records)
+    skews = estimate_clock_skews(records)
+    for device, skew in skews.items():
+        print(f"Correcting {device} clock by {-skew / 3600:+.2f}h")
+    records = [
+        (capture._replace(epoch=capture.epoch - skews.get(capture.device, 0)), path)
+        for capture, path in records
+    ]
+    records.sort(key=lambda record: (record[0].epoch, record[1]))
+
+    def local_time(capture, fallback_offset):
+        offset = capture.offset
+        if offset is None and capture.local is not None:
+            if capture.device not in skews:
+                # Nothing moved this camera's clock, so its own reading is
+                # the local time
+                offset = capture.local - capture.epoch
+        if offset is None:
+            offset = fallback_offset
+        if offset is None:
+            return datetime.fromtimestamp(capture.epoch)
+        return datetime.fromtimestamp(capture.epoch + offset, timezone.utc).replace(
+            tzinfo=None
+        )
+
+    threshold = threshold_days * 86400
     trips = []
     current_trip = []
     last_ts = None
-    for ts, fp in files_ts:
-        if last_ts is None or (ts - last_ts) <= threshold:
-            current_trip.append((fp, ts))
-        else:
-            trips.append(current_trip)
-            current_trip = [(fp, ts)]
-        last_ts = ts
+    last_fix = None
+    last_offset = None
+    for capture, path in records:
+        if last_ts is not None:
+            gap = capture.epoch - last_ts
+            moved = (
+                gps_split_km
+                and gap > GPS_SPLIT_MIN_GAP
+                and last_fix is not None
+                and capture.lat is not None
+                and distance_km(*last_fix, capture.lat, capture.lon) > gps_split_km
+            )
+            if gap > threshold or moved:
+                trips.append(current_trip)
+                current_trip = []
+                last_fix = None
+        # Absolute or clock-corrected times without a zone take the one last
+        # seen: same place, same zone
+        current_trip.append((Path(path), local_time(capture, last_offset)))
+        if capture.offset is not None:
+            last_offset = capture.offset
+        last_ts = capture.epoch
+        if capture.lat is not None and capture.lon is not None:
+            last_fix = (capture.lat, capture.lon)
     if current_trip:
         trips.append(current_trip)
     return trips
 
 
+def trip_dir_name(idx, trip):
+    start_ts = trip[0][1]
+    end_ts = trip[-1][1]
+    return f"trip_{idx}_{start_ts.strftime('%Y%m%d')}_{end_ts.strftime('%Y%m%d')}"
+
+
 def organize_trips(trips, mount_point):
     trip_dirs = []
+    organized = []
     for idx, trip in enumerate(trips, start=1):
-        start_ts = trip[0][1]
-        end_ts = trip[-1][1]
-        dir_name = (
-            f"trip_{idx}_{start_ts.strftime('%Y%m%d')}_{end_ts.strftime('%Y%m%d')}"
-        )
+        dir_name = trip_dir_name(idx, trip)
         dest = mount_point / dir_name
         dest.mkdir(exist_ok=True)
         for fp, ts in trip:
@@ -296,28 +1339,809 @@ def organize_trips(trips, mount_point):
             if target.exists():
                 target = dest / f"{ts.strftime('%Y%m%d_%H%M%S')}_{fp.name}"
             fp.rename(target)
+            organized.append((target, dir_name))
         trip_dirs.append(dir_name)
-    return trip_dirs
+    return trip_dirs, organized
+
+
+def plan_trips(trips):
+    """Destination layout for each file, without touching the card.
+
+    Returns (source, "trip_dir/name", trip_dir) tuples in capture order.
+    """
+    plan = []
+    for idx, trip in enumerate(trips, start=1):
+        dir_name = trip_dir_name(idx, trip)
+        names = set()
+        for fp, ts in trip:
+            name = fp.name
+            if name in names:
+                name = f"{ts.strftime('%Y%m%d_%H%M%S')}_{fp.name}"
+            names.add(name)
+            plan.append((fp, f"{dir_name}/{name}", dir_name))
+    return plan
+
+
+class HashingReader:
+    """File wrapper that hashes everything read through it.
+
+    Exactly `length` bytes are returned. After a read error, or if the file
+    ends early, the error is kept in `error` and the rest reads as zeros,
+    so a tar stream being written stays well-formed.
+    """
+
+    def __init__(self, f, algorithm, length):
+        self.f = f
+        self.hasher = HASH_ALGORITHMS[algorithm][0]()
+        self.remaining = length
+        self.error = None
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = b""
+        if self.error is None:
+            try:
+                data = self.f.read(size)
+                if len(data) < size:
+                    raise OSError("file is shorter than when it was listed")
+            except OSError as e:
+                self.error = e
+        if len(data) < size:
+            data += bytes(size - len(data))
+        self.remaining -= size
+        self.hasher.update(data)
+        return data
+
+    def hexdigest(self):
+        return self.hasher.hexdigest()
+
+
+class CopyPipeline:
+    """Copies planned files with read, hash and write as overlapping stages.
+
+    Each stage runs in its own thread and hands 1 MiB chunks to the next
+    through a bounded queue, so card reads, hashing and destination writes
+    overlap and memory stays at PIPELINE_DEPTH chunks per queue. Each copy
+    goes to a .part file and is renamed only after its on-disk contents hash
+    the same as what was read from the card.
+    """
+
+    def __init__(self, plan, dest_root, algorithm, depth=PIPELINE_DEPTH):
+        self.plan = plan
+        self.dest_root = Path(dest_root)
+        self.algorithm = algorithm
+        self.hash_queue = queue.Queue(maxsize=depth)
+        self.write_queue = queue.Queue(maxsize=depth)
+        self.failed = threading.Event()
+        self.busy = Counter()
+        self.copied = []
+        self.copied_bytes = 0
+        self.errors = []
+
+    def run(self, on_copied=None):
+        """Copy the plan; on_copied gets batches of verified (src, trip) pairs.
+
+        on_copied runs in the calling thread while the stages work, so files
+        verified before a crash or abort are already handed over.
+        """
+        stages = [
+            threading.Thread(target=self._stage, args=("read", self._read)),
+            threading.Thread(target=self._stage, args=("hash", self._hash)),
+            threading.Thread(target=self._stage, args=("write", self._write)),
+        ]
+        for stage in stages:
+            stage.start()
+        reported = 0
+        while reported < len(self.copied) or any(s.is_alive() for s in stages):
+            stages[-1].join(timeout=1)
+            batch = self.copied[reported:]
+            reported += len(batch)
+            if batch and on_copied:
+                on_copied(batch)
+        for stage in stages:
+            stage.join()
+        return self.copied
+
+    def _stage(self, name, body):
+        try:
+            body()
+        except Exception as e:
+            if not self.failed.is_set():  # Report the cause, not the fallout
+                self.errors.append(f"{name}: {e}")
+            self.failed.set()
+
+    def _put(self, q, item):
+        while not self.failed.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+        raise RuntimeError("pipeline aborted")
+
+    def _get(self, q):
+        while not self.failed.is_set():
+            try:
+                return q.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        raise RuntimeError("pipeline aborted")
+
+    def _read(self):
+        for src, rel, trip in self.plan:
+            self._put(self.hash_queue, ("start", (src, rel, trip)))
+            try:
+                with open(src, "rb") as f:
+                    while True:
+                        started = time.monotonic()
+                        chunk = f.read(HASH_CHUNK_SIZE)
+                        self.busy["read"] += time.monotonic() - started
+                        if not chunk:
+                            break
+                        self._put(self.hash_queue, ("chunk", chunk))
+            except OSError as e:
+                # One bad file stays on the card; the rest still get copied
+                print(f"Could not read {src}: {e}")
+                self._put(self.hash_queue, ("skip", None))
+                continue
+            self._put(self.hash_queue, ("end", None))
+        self._put(self.hash_queue, None)
+
+    def _hash(self):
+        hasher = None
+        while (item := self._get(self.hash_queue)) is not None:
+            kind, payload = item
+            started = time.monotonic()
+            if kind == "start":
+                hasher = HASH_ALGORITHMS[self.algorithm][0]()
+            elif kind == "chunk":
+                hasher.update(payload)
+            elif kind == "end":
+                payload = hasher.hexdigest()
+            self.busy["hash"] += time.monotonic() - started
+            self._put(self.write_queue, (kind, payload))
+        self._put(self.write_queue, None)
+
+    def _write(self):
+        out = None
+        try:
+            while (item := self._get(self.write_queue)) is not None:
+                kind, payload = item
+                started = time.monotonic()
+                if kind == "start":
+                    src, rel, trip = payload
+                    target = self.dest_root / rel
+                    part = target.with_name(target.name + ".part")
+                    if not target.exists():
+                        target.parent.mkdir(parents=True, exist_ok=True)
+                        out = open(part, "wb")
+                elif kind == "chunk":
+                    if out is not None:
+                        out.write(payload)
+                elif kind == "skip":
+                    if out is not None:
+                        out.close()
+                        part.unlink()
+                        out = None
+                elif out is None:
+                    self._check_existing(src, target, trip, payload)
+                else:
+                    self._finish(out, src, part, target, trip, payload)
+                    out = None
+                self.busy["write"] += time.monotonic() - started
+        finally:
+            if out is not None:  # Aborted mid-file
+                out.close()
+                part.unlink(missing_ok=True)
+
+    def _check_existing(self, src, target, trip, digest):
+        # Left by an interrupted run; it counts as copied if it matches
+        if hash_file(target, self.algorithm) == digest:
+            self._copied(src, trip)
+        else:
+            print(f"Not overwriting existing {target}, its contents differ")
+
+    def _finish(self, out, src, part, target, trip, digest):
+        with out:
+            out.flush()
+            os.fsync(out.fileno())
+            if hasattr(os, "posix_fadvise"):
+                # Make the verification read come from the disk, not the cache
+                os.posix_fadvise(out.fileno(), 0, 0, os.POSIX_FADV_DONTNEED)
+        st = os.stat(src)
+        os.utime(part, ns=(st.st_atime_ns, st.st_mtime_ns))
+        if hash_file(part, self.algorithm) != digest:
+            part.unlink()
+            print(f"Verification failed for {src} -> {target}")
+            return
+        part.rename(target)
+        self._copied(src, trip)
+
+    def _copied(self, src, trip):
+        self.copied.append((src, trip))
+        self.copied_bytes += src.stat().st_size
+        events.progress("copy", len(self.copied), self.copied_bytes, len(self.plan))
+
+
+def copy_to_local(plan, dest_root, algorithm, on_copied=None):
+    """Copy planned files into dest_root through a CopyPipeline."""
+    pipeline = CopyPipeline(plan, dest_root, algorithm)
+    started = time.monotonic()
+    copied = pipeline.run(on_copied)
+    elapsed = max(time.monotonic() - started, 1e-6)
+    # When the stages overlap well, wall time is close to the busiest stage
+    print(
+        "Stage busy time: "
+        + ", ".join(
+            f"{name} {pipeline.busy[name]:.1f}s" for name in ("read", "hash", "write")
+        )
+        + f" (wall {elapsed:.1f}s)"
+    )
+    if pipeline.errors:
+        raise RuntimeError(f"Copy pipeline failed: {'; '.join(pipeline.errors)}")
+    return copied
+
+
+def copy_to_remote(plan, remote, remote_dir, algorithm):
+    """Stream planned files to the remote as one tar, then verify remotely.
+
+    Files are hashed while they are read into the tar stream, and the remote
+    host hashes what it wrote, so card data is read once. Existing remote
+    files are never overwritten; they show up as verification failures.
+    Files that can't be read are left out and stay on the card.
+    """
+    quoted_dir = shlex.quote(remote_dir)
+    proc = subprocess.Popen(
+        [
+            "ssh",
+            remote,
+            f"mkdir -p -- {quoted_dir} && tar -xf - --skip-old-files -C {quoted_dir}",
+        ],
+        stdin=subprocess.PIPE,
+    )
+    digests = {}
+    # Files that failed part way were sent padded; the remote copy is
+    # removed if it is exactly what was sent
+    broken = {}
+    sent_bytes = 0
+    with tarfile.open(fileobj=proc.stdin, mode="w|") as tar:
+        for src, rel, _ in plan:
+            try:
+                info = tar.gettarinfo(str(src), arcname=rel)
+                f = open(src, "rb")
+            except OSError as e:
+                print(f"Could not read {src}: {e}")
+                continue
+            info.uid = info.gid = 0
+            info.uname = info.gname = ""
+            info.mode = 0o644
+            with f:
+                reader = HashingReader(f, algorithm, info.size)
+                tar.addfile(info, reader)
+            if reader.error is not None:
+                print(f"Could not read {src}: {reader.error}")
+                broken[rel] = reader.hexdigest()
+            else:
+                digests[rel] = reader.hexdigest()
+            sent_bytes += info.size
+            events.progress("copy", len(digests) + len(broken), sent_bytes, len(plan))
+    proc.stdin.close()
+    if proc.wait() != 0:
+        raise RuntimeError(f"Remote extract failed with exit code {proc.returncode}")
+
+    command = HASH_ALGORITHMS[algorithm][1]
+    output = remote_run(
+        remote,
+        f"cd -- {quoted_dir} && xargs -0 {command} --",
+        "".join(f"{rel}\0" for rel in [*digests, *broken]).encode(),
+    )
+    remote_digests = {}
+    for line in output.decode(errors="replace").splitlines():
+        digest, _, rel = line.partition("  ")
+        remote_digests[rel] = digest
+
+    padded = [
+        rel for rel, digest in broken.items() if remote_digests.get(rel) == digest
+    ]
+    if padded:
+        remote_run(
+            remote,
+            f"cd -- {quoted_dir} && xargs -0 rm -f --",
+            "".join(f"{rel}\0" for rel in padded).encode(),
+        )
+
+    copied = []
+    failed = []
+    for src, rel, trip in plan:
+        if rel not in digests:
+            continue
+        if remote_digests.get(rel) == digests[rel]:
+            copied.append((src, trip))
+        else:
+            failed.append(rel)
+    if failed:
+        print(f"Verification failed for {len(failed)} file(s): {failed}")
+    return copied
+
+
+def remote_run(remote, command, stdin=None):
+    result = subprocess.run(
+        ["ssh", remote, command], input=stdin, capture_output=True, check=True
+    )
+    return result.stdout
+
+
+def choose_hash_algorithm(remote, requested="auto"):
+    """Fastest algorithm available here and on the remote host.
+
+    With `remote` None only the local hasher is checked.
+    """
+    names = list(HASH_ALGORITHMS) if requested == "auto" else [requested]
+    for name in names:
+        factory, command = HASH_ALGORITHMS[name]
+        if factory is None:
+            continue
+        if remote is not None:
+            try:
+                remote_run(remote, f"command -v {command}")
+            except subprocess.CalledProcessError:
+                continue
+        return name
+    where = f" on {remote}" if remote is not None else ""
+    raise RuntimeError(f"No usable hash algorithm for {requested!r}{where}")
 
 
-def rsync_and_cleanup(mount_point, remote_user, remote_host, remote_dir):
+def refresh_remote_index(manifest, remote, remote_dir, algorithm):
+    """Bring the cached hashes of `remote_dir` up to date and return them.
+
+    Only files that are new or changed since the last run (by size and
+    mtime) are hashed on the remote host.
+    """
+    location = f"{remote}:{remote_dir}"
+    cached = manifest.remote_hashes(location, algorithm)
+    listing = remote_run(
+        remote,
+        f"cd -- {shlex.quote(remote_dir)} && find . -type f -printf '%s %T@ %P\\0'",
+    )
+    current = {}
+    for record in listing.split(b"\0"):
+        if record:
+            size, mtime, path = record.decode(errors="surrogateescape").split(" ", 2)
+            current[path] = (int(size), mtime)
+
+    stale = [path for path, stat in current.items() if cached.get(path, ())[:2] != stat]
+    rows = []
+    if stale:
+        print(f"Hashing {len(stale)} new remote file(s) with {algorithm}…")
+        command = HASH_ALGORITHMS[algorithm][1]
+        output = remote_run(
+            remote,
+            f"cd -- {shlex.quote(remote_dir)} && xargs -0 {command} --",
+            "".join(f"{path}\0" for path in stale).encode(errors="surrogateescape"),
+        )
+        for line in output.decode(errors="surrogateescape").splitlines():
+            digest, _, path = line.partition("  ")
+            if path in current:
+                rows.append((path, *current[path], digest))
+    removed = [path for path in cached if path not in current]
+    manifest.update_remote_hashes(location, algorithm, rows, removed)
+    hashes = {path: entry[2] for path, entry in cached.items() if path in current}
+    hashes.update((path, digest) for path, _, _, digest in rows)
+    return set(hashes.values())
+
+
+def hash_file(file_path, algorithm):
+    hasher = HASH_ALGORITHMS[algorithm][0]()
+    with open(file_path, "rb") as f:
+        while chunk := f.read(HASH_CHUNK_SIZE):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def drop_duplicates(trips, remote_hashes, algorithm, workers=HASH_WORKERS):
+    """Remove files whose content is already on the remote or earlier on the card.
+
+    Returns the trimmed trips and the list of skipped files.
+    """
+    files = [fp for trip in trips for fp, _ in trip]
+    # The hashers release the GIL on large buffers, so threads run in parallel
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        digests = dict(zip(files, pool.map(lambda fp: hash_file(fp, algorithm), files)))
+
+    seen = set(remote_hashes)
+    kept_trips = []
+    duplicates = []
+    for trip in trips:
+        kept = []
+        for fp, ts in trip:
+            if digests[fp] in seen:
+                duplicates.append(fp)
+            else:
+                seen.add(digests[fp])
+                kept.append((fp, ts))
+        if kept:
+            kept_trips.append(kept)
+    return kept_trips, duplicates
+
+
+def init_preview_worker():
+    try:
+        import pillow_heif
+
+        pillow_heif.register_heif_opener()
+    except ImportError:
+        pass
+
+
+def open_preview_image(src):
+    ext = os.path.splitext(src)[1].lower()
+    if ext in TIFF_EXTS:
+        # Decoding the raw data would take seconds; the camera's own
+        # embedded JPEG is plenty for a preview
+        with open(src, "rb") as f:
+            data = embedded_jpeg(f)
+        if data is None:
+            return None
+        image = Image.open(io.BytesIO(data))
+    else:
+        image = Image.open(src)
+    # JPEGs decode straight at a reduced scale
+    image.draft("RGB", (PREVIEW_SIZE, PREVIEW_SIZE))
+    return ImageOps.exif_transpose(image)
+
+
+def make_preview(src, dest):
+    """Write a preview of one media file; returns dest, or None if skipped."""
+    os.makedirs(os.path.dirname(dest), exist_ok=True)
+    try:
+        if os.path.splitext(src)[1].lower() in QUICKTIME_EXTS | {".avi"}:
+            subprocess.run(
+                [
+                    "ffmpeg",
+                    "-loglevel",
+                    "error",
+                    "-y",
+                    "-ss",
+                    "1",
+                    "-i",
+                    src,
+                    "-frames:v",
+                    "1",
+                    "-vf",
+                    f"scale='min({PREVIEW_SIZE},iw)':-2",
+                    dest,
+                ],
+                check=True,
+            )
+            # ffmpeg exits 0 without output when the clip is shorter than -ss
+            if not os.path.exists(dest) or os.path.getsize(dest) == 0:
+                print(f"No preview for {src}: ffmpeg wrote no frame")
+                if os.path.exists(dest):
+                    os.remove(dest)
+                return None
+            return dest
+        image = open_preview_image(src)
+        if image is None:
+            return None
+        image = image.convert("RGB")
+        image.thumbnail((PREVIEW_SIZE, PREVIEW_SIZE))
+        image.save(dest, quality=PREVIEW_QUALITY)
+        return dest
+    except (OSError, ValueError, subprocess.CalledProcessError) as e:
+        print(f"No preview for {src}: {e}")
+        return None
+
+
+def make_contact_sheets(previews, preview_dir, fmt):
+    """Tile a trip's previews into numbered contact sheets."""
+    sheets = []
+    for page, start in enumerate(range(0, len(previews), CONTACT_PER_SHEET), 1):
+        batch = previews[start : start + CONTACT_PER_SHEET]
+        rows = -(-len(batch) // CONTACT_COLUMNS)
+        sheet = Image.new(
+            "RGB",
+            (CONTACT_COLUMNS * CONTACT_TILE, rows * CONTACT_TILE),
+            (16, 16, 16),
+        )
+        placed = 0
+        for path in batch:
+            try:
+                tile = Image.open(path)
+                tile.thumbnail((CONTACT_TILE, CONTACT_TILE))
+            except (OSError, ValueError) as e:
+                print(f"Leaving {path} off the contact sheet: {e}")
+                continue
+            with tile:
+                x = (placed % CONTACT_COLUMNS) * CONTACT_TILE
+                y = (placed // CONTACT_COLUMNS) * CONTACT_TILE
+                sheet.paste(
+                    tile,
+                    (
+                        x + (CONTACT_TILE - tile.width) // 2,
+                        y + (CONTACT_TILE - tile.height) // 2,
+                    ),
+                )
+            placed += 1
+        dest = os.path.join(preview_dir, f"contact_sheet_{page:02d}.{fmt}")
+        sheet.save(dest, quality=PREVIEW_QUALITY)
+        sheets.append(dest)
+    return sheets
+
+
+def generate_previews(entries, out_root, fmt="jpg", workers=None):
+    """Previews and contact sheets for (source, "trip_dir/name") entries.
+
+    Runs right after the import read, so sources usually come from the
+    page cache. Output goes to out_root/trip_dir/.previews. Returns the
+    written paths.
+    """
+    if Image is None:
+        print("Pillow is not installed; skipping previews")
+        return []
+    out_root = Path(out_root)
+    started = time.monotonic()
+    by_trip = {}
+    with events.stage("previews") as counts, ProcessPoolExecutor(
+        max_workers=workers, initializer=init_preview_worker
+    ) as pool:
+        futures = []
+        for src, rel in entries:
+            trip, name = rel.split("/", 1)
+            dest = out_root / trip / PREVIEW_DIR_NAME / f"{name}.{fmt}"
+            futures.append((trip, pool.submit(make_preview, str(src), str(dest))))
+        for trip, future in futures:
+            if (dest := future.result()) is not None:
+                by_trip.setdefault(trip, []).append(dest)
+        sheets = [
+            pool.submit(
+                make_contact_sheets,
+                previews,
+                str(out_root / trip / PREVIEW_DIR_NAME),
+                fmt,
+            )
+            for trip, previews in by_trip.items()
+        ]
+        written = [Path(p) for previews in by_trip.values() for p in previews]
+        for future in sheets:
+            written.extend(Path(p) for p in future.result())
+        counts.update(files=len(written), bytes=sum(p.stat().st_size for p in written))
+    print(
+        f"Wrote {len(written)} preview(s) and contact sheet(s) "
+        f"in {time.monotonic() - started:.1f}s"
+    )
+    return written
+
+
+def balance_by_size(files, streams):
+    """Split files into `streams` batches of roughly equal total bytes.
+
+    Largest files go first, each to the currently lightest batch.
+    """
+    sized = sorted(((fp.stat().st_size, fp) for fp in files), reverse=True)
+    heap = [(0, i) for i in range(min(streams, len(sized)))]
+    batches = [[] for _ in heap]
+    totals = [0 for _ in heap]
+    for size, fp in sized:
+        total, i = heapq.heappop(heap)
+        batches[i].append(fp)
+        totals[i] = total + size
+        heapq.heappush(heap, (totals[i], i))
+    return list(zip(batches, totals))
+
+
+class TransferWorker(threading.Thread):
+    """Runs one rsync over a batch of files, retrying and resuming on failure."""
+
+    def __init__(self, index, mount_point, dest, files, total_bytes):
+        super().__init__(daemon=True)
+        self.index = index
+        self.mount_point = mount_point
+        self.dest = dest
+        self.files = files
+        self.total_bytes = total_bytes
+        self.done_bytes = 0
+        self.attempt = 0
+        self.error = None
+
+    def run(self):
+        file_list = "".join(
+            f"{fp.relative_to(self.mount_point)}\n" for fp in self.files
+        )
+        cmd = [
+            "rsync",
+            "-a",
+            "--partial",
+            "--prune-empty-dirs",
+            "--info=progress2",
+            "--no-inc-recursive",
+            "-e",
+            RSYNC_SSH,
+            "--files-from=-",
+            str(self.mount_point) + "/",
+            self.dest,
+        ]
+        for self.attempt in range(1, TRANSFER_RETRIES + 2):
+            # rsync skips files that already arrived, so a retry only sends
+            # what is missing and resumes the partial file
+            returncode = self._run_once(cmd, file_list)
+            if returncode == 0:
+                self.done_bytes = self.total_bytes
+                self.error = None
+                return
+            self.error = f"rsync exited with {returncode}"
+            print(
+                f"\nWorker {self.index}: {self.error} "
+                f"(attempt {self.attempt}/{TRANSFER_RETRIES + 1})"
+            )
+            if self.attempt <= TRANSFER_RETRIES:
+                time.sleep(TRANSFER_RETRY_DELAY)
+
+    def _run_once(self, cmd, file_list):
+        try:
+            proc = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+        except OSError as e:
+            print(f"\nWorker {self.index}: {e}")
+            return -1
+        proc.stdin.write(file_list.encode())
+        proc.stdin.close()
+        # Progress updates are separated by carriage returns, not newlines
+        line = b""
+        while chunk := proc.stdout.read1(4096):
+            *lines, line = re.split(rb"[\r\n]", line + chunk)
+            for text in lines:
+                self._parse_progress(text.decode(errors="replace"))
+        return proc.wait()
+
+    def _parse_progress(self, line):
+        # progress2 lines look like "  1,234,567  12%  10.00MB/s  0:00:10 ..."
+        fields = line.split()
+        if len(fields) >= 2 and fields[1].endswith("%"):
+            try:
+                sent = int(fields[0].replace(",", ""))
+            except ValueError:
+                return
+            self.done_bytes = max(self.done_bytes, min(sent, self.total_bytes))
+
+
+def format_bytes(n):
+    for unit in ("B", "KB", "MB", "GB"):
+        if n < 1024:
+            return f"{n:.1f}{unit}"
+        n /= 1024
+    return f"{n:.1f}TB"
+
+
+def transfer_files(mount_point, dest, files, streams=TRANSFER_STREAMS):
+    """Send files with concurrent rsync workers and show combined progress."""
+    workers = [
+        TransferWorker(i, mount_point, dest, batch, total)
+        for i, (batch, total) in enumerate(balance_by_size(files, streams), start=1)
+    ]
+    total_bytes = sum(w.total_bytes for w in workers)
+    print(f"Transferring {format_bytes(total_bytes)} over {len(workers)} stream(s)…")
+    with events.stage("transfer", streams=len(workers)) as counts:
+        started = time.monotonic()
+        for worker in workers:
+            worker.start()
+        while any(worker.is_alive() for worker in workers):
+            time.sleep(PROGRESS_INTERVAL)
+            done = sum(w.done_bytes for w in workers)
+            elapsed = time.monotonic() - started
+            rate = done / elapsed if elapsed > 0 else 0
+            eta = (total_bytes - done) / rate if rate > 0 else 0
+            percent = 100 * done / total_bytes if total_bytes else 100
+            sys.stdout.write(
+                f"\r{format_bytes(done)}/{format_bytes(total_bytes)} "
+                f"{percent:5.1f}%  {format_bytes(rate)}/s  ETA {eta:4.0f}s  "
+            )
+            sys.stdout.flush()
+            events.progress(
+                "transfer",
+                sum(len(w.files) for w in workers if not w.is_alive()),
+                done,
+                len(files),
+                total_bytes,
+            )
+        print()
+        counts.update(
+            files=sum(len(w.files) for w in workers if not w.error),
+            bytes=sum(w.total_bytes for w in workers if not w.error),
+        )
+
+    failed = [w for w in workers if w.error]
+    if failed:
+        raise RuntimeError(
+            "Transfer failed for worker(s) "
+            + ", ".join(f"{w.index} ({w.error})" for w in failed)
+        )
+
+
+def rsync_and_cleanup(
+    mount_point,
+    remote_user,
+    remote_host,
+    remote_dir,
+    files=None,
+    streams=TRANSFER_STREAMS,
+):
     src = str(mount_point) + "/"
     dest = f"{remote_user}@{remote_host}:{remote_dir}"
-    cmd = [
-        "rsync",
-        "-avh",
-        "--progress",
-        "--prune-empty-dirs",
-        src,
-        dest,
-    ]
-    subprocess.run(cmd, check=True)
+    if files is not None:
+        # Only send the given files instead of the whole card
+        transfer_files(mount_point, dest, files, streams)
+    else:
+        cmd = [
+            "rsync",
+            "-avh",
+            "--progress",
+            "--prune-empty-dirs",
+            src,
+            dest,
+        ]
+        subprocess.run(cmd, check=True)
     # Remove any leftover empty directories
     for dirpath, dirs, files in os.walk(str(mount_point), topdown=False):
         if not dirs and not files:
             pass  # os.rmdir(dirpath)
 
 
+def copy_and_verify(args, trips, manifest, volume, mount_point):
+    plan = plan_trips(trips)
+    trip_dirs = sorted({trip for _, _, trip in plan})
+    print(f"Planned {len(trip_dirs)} trip(s): {trip_dirs}")
+
+    total_bytes = sum(src.stat().st_size for src, _, _ in plan)
+    started = time.monotonic()
+    with events.stage("copy", total_files=len(plan), total_bytes=total_bytes) as counts:
+        if args.local_dest:
+            algorithm = choose_hash_algorithm(None, args.hash)
+            print(f"Copying {len(plan)} file(s) to {args.local_dest}…")
+            # Recorded as they are verified, so a rerun after a crash skips them
+            copied = copy_to_local(
+                plan,
+                args.local_dest,
+                algorithm,
+                on_copied=lambda batch: manifest.record(volume, mount_point, batch),
+            )
+        else:
+            remote = f"{args.remote_user}@{args.remote_host}"
+            algorithm = choose_hash_algorithm(remote, args.hash)
+            print(f"Streaming {len(plan)} file(s) to {args.remote_host}…")
+            copied = copy_to_remote(plan, remote, args.remote_dir, algorithm)
+            manifest.record(volume, mount_point, copied)
+        counts.update(
+            files=len(copied), bytes=sum(src.stat().st_size for src, _ in copied)
+        )
+    elapsed = max(time.monotonic() - started, 1e-6)
+
+    if args.previews:
+        copied_sources = {src for src, _ in copied}
+        entries = [(src, rel) for src, rel, _ in plan if src in copied_sources]
+        if args.local_dest:
+            generate_previews(entries, args.local_dest, args.preview_format)
+        else:
+            staging = tempfile.mkdtemp(prefix="import_previews_")
+            try:
+                generate_previews(entries, staging, args.preview_format)
+                rsync_and_cleanup(
+                    Path(staging),
+                    args.remote_user,
+                    args.remote_host,
+                    args.remote_dir,
+                )
+            finally:
+                shutil.rmtree(staging)
+
+    print(
+        f"Copied and verified {len(copied)}/{len(plan)} file(s), "
+        f"{format_bytes(total_bytes)} in {elapsed:.0f}s "
+        f"({format_bytes(total_bytes / elapsed)}/s)"
+    )
+    if len(copied) < len(plan):
+        raise RuntimeError("Some files were not copied; they stay on the card")
+
+
 def main():
     args = parse_args()
     mount_point = Path(args.mount_point)
@@ -362,28 +2186,101 @@ def main():
         except subprocess.CalledProcessError:
             pass
 
+    if args.events:
+        events.open(args.events)
+    events.emit("run_start", device=device, mount_point=str(mount_point))
+    status = "failed"
+    error = None
+    volume = None
+    manifest = ImportManifest(args.manifest)
     try:
         if not already_mounted:
             print(f"Mounting {device} on {mount_point}…")
-            mount_sd(device, mount_point)
+            mount_sd(device, mount_point, read_only=args.copy)
         else:
             print(f"Using existing mount point: {mount_point}")
 
+        volume = get_volume_id(device, mount_point)
+        known = {} if args.reimport else manifest.known_files(volume)
+        if known:
+            print(f"{len(known)} file(s) from this card already imported")
+
         print("Grouping media files into trips…")
-        trips = group_media_files(mount_point, args.threshold_days)
+        trips = group_media_files(
+            mount_point, args.threshold_days, args.workers, known, args.gps_split_km
+        )
         if not trips:
-            print("No media files found. Exiting.")
+            print("No new media files found. Exiting.")
+            status = "nothing_new"
             return
 
-        trip_dirs = organize_trips(trips, mount_point)
+        if args.dedup:
+            remote = f"{args.remote_user}@{args.remote_host}"
+            algorithm = choose_hash_algorithm(remote, args.hash)
+            remote_hashes = refresh_remote_index(
+                manifest, remote, args.remote_dir, algorithm
+            )
+            with events.stage("dedup", algorithm=algorithm) as counts:
+                hashed = [fp for trip in trips for fp, _ in trip]
+                trips, duplicates = drop_duplicates(trips, remote_hashes, algorithm)
+                counts.update(
+                    files=len(hashed), bytes=sum(fp.stat().st_size for fp in hashed)
+                )
+            if duplicates:
+                print(f"Skipping {len(duplicates)} file(s) already imported")
+                manifest.record(volume, mount_point, [(fp, None) for fp in duplicates])
+            if not trips:
+                print("Everything on the card is already imported. Exiting.")
+                status = "nothing_new"
+                return
+
+        if args.copy:
+            copy_and_verify(args, trips, manifest, volume, mount_point)
+            status = "ok"
+            return
+
+        with events.stage("organize") as counts:
+            trip_dirs, organized = organize_trips(trips, mount_point)
+            counts.update(
+                files=len(organized),
+                bytes=sum(fp.stat().st_size for fp, _ in organized),
+            )
         print(f"Organized into {len(trip_dirs)} trip(s): {trip_dirs}")
 
-        print(f"Starting rsync to {args.remote_host}…")
+        previews = []
+        if args.previews:
+            previews = generate_previews(
+                [(fp, f"{trip}/{fp.name}") for fp, trip in organized],
+                mount_point,
+                args.preview_format,
+            )
+
+        print(f"Starting rsync of {len(organized)} file(s) to {args.remote_host}…")
         rsync_and_cleanup(
-            mount_point, args.remote_user, args.remote_host, args.remote_dir
+            mount_point,
+            args.remote_user,
+            args.remote_host,
+            args.remote_dir,
+            [fp for fp, _ in organized] + previews,
+            args.streams,
         )
+        manifest.record(volume, mount_point, organized)
         print("Rsync and cleanup complete.")
+        status = "ok"
+    except BaseException as e:
+        error = str(e) or type(e).__name__
+        raise
     finally:
+        manifest.close()
+        events.summary(
+            status,
+            error=error,
+            device=device,
+            volume=volume,
+            remote=f"{args.remote_host}:{args.remote_dir}",
+            mode="copy" if args.copy else "organize",
+        )
+        events.close()
         if not already_mounted:
             print(f"Unmounting {mount_point}…")
             unmount_sd(mount_point)
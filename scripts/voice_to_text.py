@@ -9,18 +9,33 @@
 # ]
 # ///
 
+import argparse
+import email.parser
+import http.server
+import importlib.util
 import io
+import json
 import logging
 import os
+import queue
+import signal
+import socket
+import socketserver
 import subprocess
 import sys
+import threading
 import time
-from typing import Optional
+from collections import defaultdict
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
 
 import numpy as np
 import sounddevice as sd
 import soundfile as sf
 import requests
+from requests.adapters import HTTPAdapter
 
 # Configuration
 SAMPLE_RATE = 16000
@@ -29,17 +44,91 @@ CHANNELS = 1
 DTYPE = "int16"
 CHUNK_SIZE = 1024
 SPEACHES_BASE_URL = "http://localhost:8000"
+# Tried in order after SPEACHES_BASE_URL, e.g. a GPU box on the LAN
+FALLBACK_BASE_URLS: List[str] = []
 MODEL = "Systran/faster-distil-whisper-large-v3"
 # MODEL = "Systran/faster-whisper-small.en"
 
+# Transcription backend: "server" (speaches.ai only), "local" (in-process
+# faster-whisper only) or "auto" (speaches.ai, falling back to local)
+TRANSCRIBE_BACKEND = "auto"
+# Local backend; needs faster-whisper: uv run --with faster-whisper voice_to_text.py
+LOCAL_MODEL = "small.en"  # faster-whisper size name or CTranslate2 model repo
+LOCAL_COMPUTE_TYPE = "int8"  # CTranslate2 quantization for CPU inference
+LOCAL_CPU_THREADS = 4  # Threads for CTranslate2 (0 lets it decide)
+LOCAL_BEAM_SIZE = 1  # Greedy decoding keeps CPU latency low
+
+# Upload Configuration
+UPLOAD_CODEC = "flac"  # One of UPLOAD_CODECS
+# codec -> (soundfile format, subtype, upload filename, MIME type)
+UPLOAD_CODECS = {
+    "wav": ("WAV", "PCM_16", "audio.wav", "audio/wav"),
+    "flac": ("FLAC", "PCM_16", "audio.flac", "audio/flac"),
+    "opus": ("OGG", "OPUS", "audio.ogg", "audio/ogg"),
+}
+TRANSCRIBE_TIMEOUT_BASE = 10.0  # Seconds allowed for any request
+TRANSCRIBE_TIMEOUT_PER_SECOND = 1.0  # Extra seconds per second of audio
+TRANSCRIBE_CONNECT_TIMEOUT = 2.0  # Fail over quickly when a host is unreachable
+TRANSCRIBE_RETRIES = 2  # Extra passes over the endpoint list after the first
+TRANSCRIBE_BACKOFF = 0.5  # Seconds before the first retry pass, doubled each pass
+ENDPOINT_COOLDOWN = (
+    30.0  # Seconds a failing endpoint is tried last, doubled per failure
+)
+ENDPOINT_MAX_COOLDOWN = 300.0
+
 # VAD Configuration
 SILENCE_THRESHOLD = (
-    0.01  # RMS threshold for silence detection (will be auto-calibrated)
+    0.01  # Initial RMS threshold before the noise floor has been learned
 )
 SILENCE_DURATION = 1.0  # Seconds of silence before stopping
 MIN_RECORDING_DURATION = 0.5  # Minimum recording duration in seconds
-NOISE_CALIBRATION_TIME = 1.0  # Seconds to calibrate background noise
 SPEECH_MULTIPLIER = 1  # Speech must be this many times louder than noise floor
+MIN_NOISE_THRESHOLD = 0.005  # Threshold floor for very quiet environments
+
+# VAD engine selection (see VAD_ENGINES); "webrtc" needs the webrtcvad package
+VAD_ENGINE = "spectral"
+SPECTRAL_SPEECH_BAND = (250.0, 4000.0)  # Hz band that carries most speech energy
+SPECTRAL_BAND_RATIO = 0.3  # Minimum share of frame energy inside that band
+SPECTRAL_MAX_ZCR = 0.35  # Zero-crossing rate above this is treated as clicks/hiss
+SPECTRAL_ONSET_FRAMES = 2  # Consecutive speech frames needed to trigger
+SPECTRAL_HANGOVER_FRAMES = 5  # Frames speech is held after the last hit (~320ms)
+SPECTRAL_RELEASE_RATIO = 0.6  # Threshold scale while already in speech
+WEBRTC_AGGRESSIVENESS = 2  # 0 (least) to 3 (most aggressive filtering)
+WEBRTC_FRAME_SAMPLES = 480  # 30ms at 16kHz, one of the sizes webrtcvad accepts
+
+# Text injection (see INJECTORS)
+INJECT_BACKEND = "auto"  # "auto" picks wtype or clipboard per transcription
+INJECT_PASTE_MIN_CHARS = 40  # Longer text is pasted instead of typed
+# Window classes (hyprctl) that drop simulated keystrokes; always paste there
+INJECT_ALWAYS_PASTE_CLASSES: set = set()
+# Window classes where paste is Ctrl+Shift+V instead of Ctrl+V
+TERMINAL_CLASSES = {"kitty", "Alacritty", "com.mitchellh.ghostty", "foot"}
+CLIPBOARD_RESTORE_DELAY = 0.5  # Seconds before the previous clipboard returns
+YDOTOOL_KEY_DELAY_MS = 2  # Per-key delay through the ydotoold virtual keyboard
+
+# Noise floor tracking (per-frame EMA, see NoiseFloorTracker)
+NOISE_FALL_ALPHA = 0.2  # How fast the floor follows the room getting quieter
+NOISE_RISE_ALPHA = 0.005  # How fast it follows the room getting louder (~13s)
+NOISE_DEVIATION_ALPHA = 0.05  # Smoothing for the spread of quiet frames
+NOISE_STD_MULTIPLIER = 2  # Threshold sits this many deviations above the floor
+NOISE_MARGIN = 1.5  # ...and this many times the floor, so steady noise stays below
+NOISE_WARMUP_FRAMES = 8  # Frames averaged plainly when no saved estimate exists
+NOISE_STATE_FILE = "/tmp/voice_to_text.noise.json"
+MAX_RECORDING_DURATION = 60.0  # Safety timeout for a whole session
+PRE_ROLL_DURATION = 0.3  # Audio kept from before VAD triggers (speech onset)
+
+# Streaming Configuration
+# Pause after the last voiced frame that closes a segment while still talking;
+# the VAD hangover counts towards it, so it should not be shorter than that
+STREAM_SEGMENT_SILENCE = 0.35
+STREAM_MIN_SEGMENT = 1.5  # Don't cut segments shorter than this (seconds)
+STREAM_MAX_SEGMENT = 12.0  # Force a cut on long run-on speech (seconds)
+STREAM_WORKERS = 2  # Concurrent in-flight transcription requests
+
+# Benchmark Configuration (see run_benchmark)
+BENCH_RUNS = 3  # Replays per fixture
+BENCH_SERVER_LATENCY = 0.15  # Stand-in server: fixed seconds per request
+BENCH_SERVER_RTF = 0.1  # Stand-in server: extra seconds per second of audio
 
 # Logging Configuration
 LOG_FILE = "/tmp/voice_to_text.log"
@@ -47,6 +136,11 @@ LOG_FILE = "/tmp/voice_to_text.log"
 # Lock file for singleton instance
 LOCK_FILE = "/tmp/voice_to_text.lock"
 
+# Daemon control socket
+SOCKET_PATH = os.path.join(
+    os.environ.get("XDG_RUNTIME_DIR", "/tmp"), "voice_to_text.sock"
+)
+
 # Set up logging to both console and file
 logging.basicConfig(
     level=logging.INFO,
@@ -99,195 +193,906 @@ def release_lock():
         logger.error(f"Failed to remove lock file: {e}")
 
 
-class VoiceToText:
-    def __init__(self, base_url: str = SPEACHES_BASE_URL, model: str = MODEL):
-        self.base_url = base_url
-        self.model = model
-        self.recording = False
-        self.audio_buffer = []
-
-    def transcribe_audio(self, audio_data: bytes) -> Optional[str]:
-        """Send audio data to speaches.ai for transcription."""
+class NoiseFloorTracker:
+    """Running estimate of the background noise level and speech threshold.
+
+    Updated from every frame of the recording stream instead of a separate
+    calibration pass. The floor drops quickly when the room gets quieter but
+    rises slowly, so speech barely moves it while a fan switching on is
+    picked up within seconds. The last estimate is saved between runs so
+    listening starts with a sensible threshold straight away.
+    """
+
+    def __init__(
+        self,
+        floor: Optional[float] = None,
+        deviation: float = 0.0,
+        state_path: Optional[str] = None,
+    ):
+        # Where save() writes the estimate; None keeps it in memory only
+        self.state_path = state_path
+        self.floor = floor if floor is not None else SILENCE_THRESHOLD / 2
+        self.deviation = deviation
+        # Zero means nothing has been learned yet, so warm up from scratch
+        self.frames = 0 if floor is None else NOISE_WARMUP_FRAMES
+
+    @property
+    def threshold(self) -> float:
+        adaptive = self.floor * NOISE_MARGIN + self.deviation * NOISE_STD_MULTIPLIER
+        return max(adaptive, MIN_NOISE_THRESHOLD) * SPEECH_MULTIPLIER
+
+    def update(self, rms: float):
+        """Fold one frame's RMS into the estimate."""
+        if self.frames < NOISE_WARMUP_FRAMES:
+            # Plain running mean until there is enough history for the EMA
+            alpha = 1.0 / (self.frames + 1)
+        elif rms < self.floor:
+            alpha = NOISE_FALL_ALPHA
+        else:
+            alpha = NOISE_RISE_ALPHA
+
+        # Only quiet frames describe the spread of the noise itself
+        if rms <= self.threshold or self.frames < NOISE_WARMUP_FRAMES:
+            delta = abs(rms - self.floor)
+            self.deviation += NOISE_DEVIATION_ALPHA * (delta - self.deviation)
+
+        self.floor += alpha * (rms - self.floor)
+        self.frames += 1
+
+    @classmethod
+    def load(cls, path: str = NOISE_STATE_FILE) -> "NoiseFloorTracker":
+        """Restore the estimate saved by a previous run, if any."""
         try:
-            # Create a temporary file-like object for the audio data
-            files = {"file": ("audio.wav", audio_data, "audio/wav")}
-            data = {"model": self.model, "response_format": "json"}
-
-            response = requests.post(
-                f"{self.base_url}/v1/audio/transcriptions",
-                files=files,
-                data=data,
-                timeout=10,
-            )
-
-            if response.status_code == 200:
-                result = response.json()
-                return result.get("text", "").strip()
+            with open(path, "r") as f:
+                state = json.load(f)
+            return cls(float(state["floor"]), float(state["deviation"]), path)
+        except (OSError, ValueError, KeyError, TypeError):
+            return cls(state_path=path)
+
+    def save(self):
+        if self.state_path is None:
+            return
+        try:
+            with open(self.state_path, "w") as f:
+                json.dump({"floor": self.floor, "deviation": self.deviation}, f)
+        except OSError as e:
+            logger.warning(f"Could not save noise floor estimate: {e}")
+
+
+class CaptureBuffer:
+    """Fixed-capacity int16 sample buffer for one recording session.
+
+    Allocated once and reused, so capture does no per-chunk allocation and
+    memory stays flat however long the session runs. Instead of wrapping
+    around, the live region is moved back to the front when the end is
+    reached, which keeps ``view()`` contiguous so it can be encoded without
+    first being copied. Before speech starts only the last few hundred
+    milliseconds are retained as pre-roll.
+    """
+
+    def __init__(self, capacity: int, channels: int = CHANNELS):
+        self._data = np.zeros((capacity, channels), dtype=DTYPE)
+        self._start = 0
+        self._end = 0
+
+    def __len__(self) -> int:
+        return self._end - self._start
+
+    @property
+    def capacity(self) -> int:
+        return len(self._data)
+
+    def write(self, chunk: np.ndarray):
+        n = len(chunk)
+        if self._end + n > self.capacity:
+            # Drop the oldest samples if the live region is already full
+            self._start = max(self._start, self._end + n - self.capacity)
+            live = len(self)
+            self._data[:live] = self._data[self._start : self._end]
+            self._start, self._end = 0, live
+        self._data[self._end : self._end + n] = chunk
+        self._end += n
+
+    def trim_to(self, samples: int):
+        """Keep only the most recent ``samples`` samples."""
+        self._start = max(self._start, self._end - samples)
+
+    def view(self) -> np.ndarray:
+        """Live samples, without copying; only valid until the next write."""
+        return self._data[self._start : self._end]
+
+    def consume(self):
+        """Forget everything written so far (the view has been handed off)."""
+        self._start = self._end
+
+    def clear(self):
+        self._start = self._end = 0
+
+
+class VADEngine:
+    """Per-frame voice activity detector with onset and hangover smoothing.
+
+    Subclasses implement ``detect`` for a single frame; ``is_speech`` turns
+    that raw decision into a stable one by requiring ``onset_frames``
+    consecutive hits to start and holding speech for ``hangover_frames``
+    after the last hit, so clicks don't trigger and word endings aren't cut.
+    """
+
+    name = "base"
+    onset_frames = 1
+    hangover_frames = 0
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.active = False
+        self._run = 0
+        self._hang = 0
+
+    def detect(self, frame: np.ndarray, rms: float, threshold: float) -> bool:
+        raise NotImplementedError
+
+    def is_speech(self, frame: np.ndarray, rms: float, threshold: float) -> bool:
+        """Classify one float32 frame given its RMS and the noise threshold."""
+        hit = self.detect(frame, rms, threshold)
+        self._run = self._run + 1 if hit else 0
+
+        if self.active:
+            if hit:
+                self._hang = self.hangover_frames
+            elif self._hang > 0:
+                self._hang -= 1
             else:
-                logger.error(
-                    f"Transcription failed: {response.status_code} - {response.text}"
-                )
-                return None
+                self.active = False
+        elif self._run >= self.onset_frames:
+            self.active = True
+            self._hang = self.hangover_frames
 
-        except Exception as e:
-            logger.error(f"Error during transcription: {e}")
-            return None
+        return self.active
 
-    def type_text(self, text: str):
-        """Use wtype to type the transcribed text."""
-        try:
-            subprocess.run(["wtype", text], check=True)
-            logger.info(f"Typed: {text}")
-        except subprocess.CalledProcessError as e:
-            logger.error(f"Error typing text: {e}")
-        except FileNotFoundError:
-            logger.error("wtype not found. Please install it: sudo apt install wtype")
 
-    def calculate_rms(self, audio_data: np.ndarray) -> float:
-        """Calculate RMS (Root Mean Square) of audio data for voice activity detection."""
-        return np.sqrt(np.mean(audio_data**2))
+class RMSVAD(VADEngine):
+    """Plain energy gate: speech whenever the frame RMS beats the threshold."""
 
-    def calibrate_noise_floor(self) -> float:
-        """Calibrate the background noise level for adaptive VAD."""
-        logger.info(
-            f"Calibrating background noise level for {NOISE_CALIBRATION_TIME} seconds..."
+    name = "rms"
+
+    def detect(self, frame: np.ndarray, rms: float, threshold: float) -> bool:
+        return rms > threshold
+
+
+class SpectralVAD(VADEngine):
+    """Energy gate combined with speech-band energy and zero-crossing checks.
+
+    Fan hum puts most of its energy below the speech band and keyboard clicks
+    are short and broadband with a high zero-crossing rate, so both fail at
+    least one check even when they are loud. The threshold is relaxed while
+    speech is active so quiet word endings are kept.
+    """
+
+    name = "spectral"
+    onset_frames = SPECTRAL_ONSET_FRAMES
+    hangover_frames = SPECTRAL_HANGOVER_FRAMES
+
+    def __init__(self):
+        super().__init__()
+        self._window = np.hanning(CHUNK_SIZE).astype(np.float32)
+        freqs = np.fft.rfftfreq(CHUNK_SIZE, 1.0 / SAMPLE_RATE)
+        low, high = SPECTRAL_SPEECH_BAND
+        self._band = slice(
+            int(np.searchsorted(freqs, low)), int(np.searchsorted(freqs, high))
         )
-        logger.info("Please remain quiet during calibration...")
 
-        noise_samples = []
-        start_time = time.time()
+    def detect(self, frame: np.ndarray, rms: float, threshold: float) -> bool:
+        if self.active:
+            threshold *= SPECTRAL_RELEASE_RATIO
+        if rms <= threshold:
+            return False
 
-        stream = sd.InputStream(
-            channels=CHANNELS, samplerate=SAMPLE_RATE, dtype=DTYPE, blocksize=CHUNK_SIZE
+        samples = frame.reshape(-1)
+        if len(samples) != CHUNK_SIZE:
+            # Short trailing frame: not enough resolution for the spectrum
+            return True
+
+        crossings = np.count_nonzero(np.diff(np.signbit(samples)))
+        if crossings / len(samples) > SPECTRAL_MAX_ZCR:
+            return False
+
+        power = np.abs(np.fft.rfft(samples * self._window)) ** 2
+        total = float(power.sum())
+        if total <= 0.0:
+            return False
+        return float(power[self._band].sum()) / total >= SPECTRAL_BAND_RATIO
+
+
+class WebRTCVAD(VADEngine):
+    """Google's WebRTC VAD via the optional ``webrtcvad`` package.
+
+    Each chunk is split into 30ms sub-frames and counts as speech when most
+    of them do. The energy threshold still gates it so the adaptive noise
+    floor keeps working.
+    """
+
+    name = "webrtc"
+    hangover_frames = SPECTRAL_HANGOVER_FRAMES
+
+    def __init__(self):
+        import webrtcvad  # Optional dependency, checked by make_vad()
+
+        self._vad = webrtcvad.Vad(WEBRTC_AGGRESSIVENESS)
+        super().__init__()
+
+    def detect(self, frame: np.ndarray, rms: float, threshold: float) -> bool:
+        if rms <= threshold * SPECTRAL_RELEASE_RATIO:
+            return False
+
+        pcm = (frame.reshape(-1) * 32767.0).astype(np.int16)
+        count = len(pcm) // WEBRTC_FRAME_SAMPLES
+        if count == 0:
+            return rms > threshold
+
+        sub_frames = pcm[: count * WEBRTC_FRAME_SAMPLES].reshape(count, -1)
+        votes = sum(
+            self._vad.is_speech(sub_frame.tobytes(), SAMPLE_RATE)
+            for sub_frame in sub_frames
+        )
+        return votes * 2 >= count
+
+
+VAD_ENGINES = {engine.name: engine for engine in (RMSVAD, SpectralVAD, WebRTCVAD)}
+
+
+def make_vad(name: str = VAD_ENGINE) -> VADEngine:
+    """Build the named VAD engine, falling back to the spectral detector."""
+    engine = VAD_ENGINES.get(name)
+    if engine is None:
+        logger.warning(f"Unknown VAD engine {name!r}, using spectral")
+        return SpectralVAD()
+    try:
+        return engine()
+    except ImportError as e:
+        logger.warning(f"VAD engine {name!r} unavailable ({e}), using spectral")
+        return SpectralVAD()
+
+
+def active_window_class() -> Optional[str]:
+    """Class of the focused Hyprland window, or None if it can't be read."""
+    try:
+        result = subprocess.run(
+            ["hyprctl", "activewindow", "-j"],
+            capture_output=True,
+            text=True,
+            timeout=1,
+            check=True,
+        )
+        return json.loads(result.stdout).get("class")
+    except (OSError, subprocess.SubprocessError, ValueError, AttributeError):
+        return None
+
+
+class TextInjector:
+    """Delivers transcribed text to the focused window."""
+
+    name = "base"
+
+    def inject(self, text: str):
+        raise NotImplementedError
+
+    def finish(self):
+        """Called when a dictation session ends, before the process may exit."""
+
+
+class WtypeInjector(TextInjector):
+    """Simulates each keystroke with wtype; reliable but slow for long text."""
+
+    name = "wtype"
+
+    def inject(self, text: str):
+        subprocess.run(["wtype", text], check=True)
+
+
+class YdotoolInjector(TextInjector):
+    """Types through the uinput virtual keyboard kept open by ydotoold.
+
+    The daemon holds the device, so each call skips the Wayland virtual
+    keyboard setup wtype does, and works in apps that ignore it.
+    """
+
+    name = "ydotool"
+
+    def inject(self, text: str):
+        subprocess.run(
+            ["ydotool", "type", "--key-delay", str(YDOTOOL_KEY_DELAY_MS), "--", text],
+            check=True,
         )
 
+
+class ClipboardInjector(TextInjector):
+    """Puts the text on the clipboard and sends one paste shortcut.
+
+    Takes the same time for any length of text. The clipboard from before the
+    session's first paste is put back when the session finishes, at least
+    CLIPBOARD_RESTORE_DELAY after the last paste so the target app has read
+    it. Later segments of a streaming session don't mistake earlier dictated
+    text for the user's clipboard.
+    """
+
+    name = "clipboard"
+
+    def __init__(self):
+        self._saved = False
+        self._previous: Optional[bytes] = None
+        self._last_paste = 0.0
+
+    def inject(self, text: str, window_class: Optional[str] = None):
+        if not self._saved:
+            self._previous = self._text_clipboard()
+            self._saved = True
+        subprocess.run(["wl-copy"], input=text.encode(), check=True)
+
+        window_class = window_class or active_window_class()
+        if window_class in TERMINAL_CLASSES:
+            shortcut = ["-M", "ctrl", "-M", "shift", "v", "-m", "shift", "-m", "ctrl"]
+        else:
+            shortcut = ["-M", "ctrl", "v", "-m", "ctrl"]
+        subprocess.run(["wtype", *shortcut], check=True)
+        self._last_paste = time.monotonic()
+
+    def finish(self):
+        if not self._saved:
+            return
+        previous, self._previous, self._saved = self._previous, None, False
+        if previous is None:
+            return
+        time.sleep(
+            max(0.0, self._last_paste + CLIPBOARD_RESTORE_DELAY - time.monotonic())
+        )
+        subprocess.run(["wl-copy"], input=previous, check=True)
+
+    def _text_clipboard(self) -> Optional[bytes]:
+        """Current clipboard contents if they are text, else None."""
         try:
-            stream.start()
+            types = subprocess.run(
+                ["wl-paste", "--list-types"], capture_output=True, text=True, timeout=1
+            )
+            if not any(t.startswith("text/") for t in types.stdout.split()):
+                return None
+            current = subprocess.run(
+                ["wl-paste", "--no-newline"], capture_output=True, timeout=1
+            )
+            return current.stdout if current.returncode == 0 else None
+        except (OSError, subprocess.SubprocessError):
+            return None
 
-            while time.time() - start_time < NOISE_CALIBRATION_TIME:
-                audio_chunk, overflowed = stream.read(CHUNK_SIZE)
-                if overflowed:
-                    logger.warning("Audio buffer overflowed during calibration")
 
-                # Convert to float for RMS calculation
-                audio_float = audio_chunk.astype(np.float32) / 32768.0
-                rms = self.calculate_rms(audio_float)
-                noise_samples.append(rms)
+class AutoInjector(TextInjector):
+    """Types short text with wtype and pastes long text or into picky apps."""
 
-                # time.sleep(0.01)  # Small delay to prevent excessive CPU usage
+    name = "auto"
 
-        finally:
-            stream.stop()
-            stream.close()
+    def __init__(self):
+        self.typer = WtypeInjector()
+        self.paster = ClipboardInjector()
 
-        # Calculate noise floor statistics
-        noise_floor = np.mean(noise_samples)
-        noise_std = np.std(noise_samples)
-        adaptive_threshold = noise_floor + (
-            noise_std * 2
-        )  # 2 standard deviations above mean
+    def inject(self, text: str):
+        window_class = active_window_class()
+        if (
+            len(text) >= INJECT_PASTE_MIN_CHARS
+            or window_class in INJECT_ALWAYS_PASTE_CLASSES
+        ):
+            self.paster.inject(text, window_class)
+        else:
+            self.typer.inject(text)
 
-        # Ensure minimum threshold for very quiet environments
-        final_threshold = max(adaptive_threshold, 0.005)
+    def finish(self):
+        self.paster.finish()
 
-        logger.info(f"Noise floor: {noise_floor:.4f}")
-        logger.info(f"Noise std: {noise_std:.4f}")
-        logger.info(f"Adaptive threshold: {final_threshold:.4f}")
 
-        return final_threshold
+INJECTORS = {
+    injector.name: injector
+    for injector in (AutoInjector, WtypeInjector, ClipboardInjector, YdotoolInjector)
+}
 
-    def record_with_vad(self) -> bytes:
-        """Record audio with voice activity detection."""
-        # First calibrate the noise floor
-        adaptive_threshold = self.calibrate_noise_floor()
 
-        logger.info("Calibration complete! Now listening... Start speaking!")
+class TranscriptionError(Exception):
+    """A transcription request failed in a way retrying won't fix."""
 
-        audio_buffer = []
-        silence_start = None
-        recording_started = False
-        start_time = time.time()
 
-        logger.info(f"Audio settings: {SAMPLE_RATE}Hz, {CHANNELS} channel(s), {DTYPE}")
-        logger.info(
-            f"VAD settings: threshold={adaptive_threshold:.4f}, silence_duration={SILENCE_DURATION}s"
+class TranscriptionClient:
+    """Pooled, retrying client for one or more speaches.ai endpoints.
+
+    Endpoints are tried in configured order. Health is learned from real
+    requests instead of a pre-flight probe: a connection error, timeout or
+    5xx puts the endpoint on a cooldown that grows with repeated failures,
+    during which it is only tried after the healthy ones. A success clears
+    it. Connections are kept alive in a shared session, so the common case
+    is a single round trip on a warm socket.
+    """
+
+    def __init__(self, base_urls: Sequence[str], model: str = MODEL):
+        self.base_urls = [url.rstrip("/") for url in base_urls]
+        self.model = model
+        self.session = requests.Session()
+        # Room for every in-flight streaming segment on each host
+        adapter = HTTPAdapter(
+            pool_connections=len(self.base_urls), pool_maxsize=STREAM_WORKERS
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._failures = {url: 0 for url in self.base_urls}
+        self._retry_at = {url: 0.0 for url in self.base_urls}
+        self._health_lock = threading.Lock()
+
+    def close(self):
+        self.session.close()
+
+    def _ordered_endpoints(self) -> List[str]:
+        """Healthy endpoints first, each group in configured order."""
+        now = time.monotonic()
+        with self._health_lock:
+            return sorted(self.base_urls, key=lambda url: self._retry_at[url] > now)
+
+    def _mark_ok(self, url: str):
+        with self._health_lock:
+            if self._failures[url]:
+                logger.info(f"Endpoint {url} recovered")
+            self._failures[url] = 0
+            self._retry_at[url] = 0.0
+
+    def _mark_failed(self, url: str, reason: str):
+        with self._health_lock:
+            self._failures[url] += 1
+            cooldown = min(
+                ENDPOINT_COOLDOWN * 2 ** (self._failures[url] - 1),
+                ENDPOINT_MAX_COOLDOWN,
+            )
+            self._retry_at[url] = time.monotonic() + cooldown
+        logger.warning(
+            f"Endpoint {url} failed ({reason}); deprioritized for {cooldown:.0f}s"
         )
 
-        stream = sd.InputStream(
+    def _post(
+        self, url: str, filename: str, audio_data: bytes, mime_type: str, timeout: float
+    ) -> str:
+        response = self.session.post(
+            f"{url}/v1/audio/transcriptions",
+            files={"file": (filename, audio_data, mime_type)},
+            data={"model": self.model, "response_format": "json"},
+            timeout=(TRANSCRIBE_CONNECT_TIMEOUT, timeout),
+        )
+        if response.status_code >= 500 or response.status_code == 429:
+            raise requests.HTTPError(f"HTTP {response.status_code}", response=response)
+        if response.status_code != 200:
+            raise TranscriptionError(f"{response.status_code} - {response.text}")
+        return response.json().get("text", "").strip()
+
+    def transcribe(
+        self,
+        filename: str,
+        audio_data: bytes,
+        mime_type: str,
+        timeout: float,
+        retries: int = TRANSCRIBE_RETRIES,
+    ) -> Optional[str]:
+        """Transcribe encoded audio, failing over between endpoints."""
+        for attempt in range(retries + 1):
+            if attempt:
+                delay = TRANSCRIBE_BACKOFF * 2 ** (attempt - 1)
+                logger.info(f"All endpoints failed, retrying in {delay:.1f}s...")
+                time.sleep(delay)
+
+            for url in self._ordered_endpoints():
+                try:
+                    text = self._post(url, filename, audio_data, mime_type, timeout)
+                except TranscriptionError as e:
+                    logger.error(f"Transcription failed at {url}: {e}")
+                    return None
+                except (requests.RequestException, ValueError) as e:
+                    self._mark_failed(url, str(e))
+                    continue
+                self._mark_ok(url)
+                return text
+
+        logger.error("Transcription failed on every endpoint")
+        return None
+
+
+class LocalWhisperBackend:
+    """In-process faster-whisper (CTranslate2) transcription on the CPU.
+
+    The model is loaded on first use and then kept for the lifetime of the
+    process, so a daemon pays the load time once.
+    """
+
+    def __init__(
+        self,
+        model: str = LOCAL_MODEL,
+        compute_type: str = LOCAL_COMPUTE_TYPE,
+        cpu_threads: int = LOCAL_CPU_THREADS,
+    ):
+        self.model_name = model
+        self.compute_type = compute_type
+        self.cpu_threads = cpu_threads
+        self._model = None
+        self._load_lock = threading.Lock()
+
+    @staticmethod
+    def available() -> bool:
+        return importlib.util.find_spec("faster_whisper") is not None
+
+    def load(self):
+        with self._load_lock:
+            if self._model is not None:
+                return
+            from faster_whisper import WhisperModel
+
+            logger.info(
+                f"Loading local model {self.model_name} "
+                f"({self.compute_type}, {self.cpu_threads} threads)..."
+            )
+            start = time.time()
+            self._model = WhisperModel(
+                self.model_name,
+                device="cpu",
+                compute_type=self.compute_type,
+                cpu_threads=self.cpu_threads,
+            )
+            logger.info(f"Local model loaded in {time.time() - start:.1f}s")
+
+    def transcribe(self, audio: np.ndarray) -> Optional[str]:
+        """Transcribe float32 mono samples at SAMPLE_RATE."""
+        self.load()
+        segments, _ = self._model.transcribe(
+            audio.reshape(-1), beam_size=LOCAL_BEAM_SIZE, vad_filter=False
+        )
+        return "".join(segment.text for segment in segments).strip()
+
+
+class VoiceToText:
+    def __init__(
+        self,
+        base_url: str = SPEACHES_BASE_URL,
+        model: str = MODEL,
+        vad: Optional[VADEngine] = None,
+        codec: str = UPLOAD_CODEC,
+        fallback_urls: Sequence[str] = FALLBACK_BASE_URLS,
+        backend: str = TRANSCRIBE_BACKEND,
+        local: Optional[LocalWhisperBackend] = None,
+        injector: Optional[TextInjector] = None,
+    ):
+        self.base_url = base_url
+        self.model = model
+        self.client = TranscriptionClient([base_url, *fallback_urls], model)
+        self.backend = backend
+        self.local = None
+        if backend in ("local", "auto"):
+            if LocalWhisperBackend.available():
+                self.local = local if local is not None else LocalWhisperBackend()
+            elif backend == "local":
+                raise RuntimeError(
+                    "faster-whisper is not installed; run with "
+                    "'uv run --with faster-whisper' or use --backend server"
+                )
+            else:
+                logger.warning(
+                    "faster-whisper is not installed, so there is no local "
+                    "fallback; run with 'uv run --with faster-whisper' to enable it"
+                )
+        if backend == "local":
+            # Nothing is uploaded, so skip compressing audio just to decode it
+            codec = "wav"
+        self.vad = vad if vad is not None else make_vad()
+        self.injector = (
+            injector if injector is not None else INJECTORS[INJECT_BACKEND]()
+        )
+        file_format, subtype = UPLOAD_CODECS[codec][:2]
+        if not sf.check_format(file_format, subtype):
+            # Opus needs libsndfile >= 1.0.29; FLAC is always there
+            logger.warning(f"libsndfile cannot encode {codec}, uploading flac")
+            codec = "flac"
+        self.codec = codec
+        self.recording = False
+        self.audio_buffer = []
+        # Set by keep_warm(); otherwise a stream is opened per recording
+        self._stream: Optional[sd.InputStream] = None
+        # Updated from every recorded frame; survives across daemon sessions
+        self.noise_floor = NoiseFloorTracker.load()
+        self.stop_requested = threading.Event()
+        # Preallocated for the longest session plus pre-roll
+        self._capture = CaptureBuffer(
+            int((MAX_RECORDING_DURATION + PRE_ROLL_DURATION) * SAMPLE_RATE) + CHUNK_SIZE
+        )
+        self._frame = np.zeros((CHUNK_SIZE, CHANNELS), dtype=np.float32)
+        # Wall-clock seconds spent per pipeline stage, read by the benchmark
+        self.stage_times: Dict[str, List[float]] = defaultdict(list)
+        self.last_capture: Dict[str, Optional[float]] = {}
+
+    @contextmanager
+    def _stage(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stage_times[name].append(time.perf_counter() - start)
+
+    def attach_stream(self, stream):
+        """Use ``stream`` (anything with the sd.InputStream read API) for every recording."""
+        if self._stream is not None:
+            self._stream.close()
+        self._stream = stream
+
+    def keep_warm(self):
+        """Open the audio stream (and local model, if used) once for a long-lived process."""
+        self.attach_stream(self._open_stream())
+        if self.backend == "local":
+            self.local.load()
+
+    def close(self):
+        """Release the persistent audio stream and HTTP connections."""
+        if self._stream is not None:
+            self._stream.close()
+            self._stream = None
+        self.client.close()
+
+    def _open_stream(self) -> sd.InputStream:
+        return sd.InputStream(
             channels=CHANNELS, samplerate=SAMPLE_RATE, dtype=DTYPE, blocksize=CHUNK_SIZE
         )
 
+    @contextmanager
+    def _input_stream(self) -> Iterator[sd.InputStream]:
+        """Start the persistent stream if there is one, else a temporary one."""
+        stream = self._stream if self._stream is not None else self._open_stream()
         try:
             stream.start()
+            yield stream
+        finally:
+            stream.stop()
+            if stream is not self._stream:
+                stream.close()
+
+    def transcribe_audio(self, audio_data: bytes, duration: float) -> Optional[str]:
+        """Transcribe encoded audio of ``duration`` seconds with the configured backend.
+
+        In "auto" mode speaches.ai is tried first (without retry passes when a
+        local model can take over) and the local model is used if it fails.
+        """
+        with self._stage("transcribe"):
+            return self._transcribe(audio_data, duration)
+
+    def _transcribe(self, audio_data: bytes, duration: float) -> Optional[str]:
+        if self.backend != "local":
+            filename, mime_type = UPLOAD_CODECS[self.codec][2:]
+            # Long clips take longer to transcribe; short ones fail fast
+            timeout = TRANSCRIBE_TIMEOUT_BASE + duration * TRANSCRIBE_TIMEOUT_PER_SECOND
+            retries = 0 if self.local is not None else TRANSCRIBE_RETRIES
+            try:
+                text = self.client.transcribe(
+                    filename, audio_data, mime_type, timeout, retries
+                )
+            except Exception as e:
+                logger.error(f"Error during transcription: {e}")
+                text = None
+            if text is not None or self.local is None:
+                return text
+            logger.warning("speaches.ai unavailable, falling back to local model")
 
+        try:
+            # Decoding is cheap next to inference and avoids holding a raw copy
+            # of every segment just in case the server fails
+            audio, _ = sf.read(io.BytesIO(audio_data), dtype="float32")
+            return self.local.transcribe(audio)
+        except Exception as e:
+            logger.error(f"Error during local transcription: {e}")
+            return None
+
+    def type_text(self, text: str):
+        """Deliver the transcribed text to the focused window."""
+        try:
+            with self._stage("type"):
+                self.injector.inject(text)
+            logger.info(f"Typed ({self.injector.name}): {text}")
+        except subprocess.CalledProcessError as e:
+            logger.error(f"Error typing text: {e}")
+        except FileNotFoundError as e:
+            logger.error(
+                f"{e.filename} not found. Please install it "
+                "(wtype, wl-clipboard or ydotool)"
+            )
+
+    def finish_typing(self):
+        """Let the injector clean up, e.g. restore the clipboard it borrowed."""
+        try:
+            self.injector.finish()
+        except (OSError, subprocess.CalledProcessError) as e:
+            logger.error(f"Error restoring clipboard: {e}")
+
+    def calculate_rms(self, audio_data: np.ndarray) -> float:
+        """Calculate RMS (Root Mean Square) of audio data for voice activity detection."""
+        flat = audio_data.reshape(-1)
+        return float(np.sqrt(np.dot(flat, flat) / len(flat)))
+
+    def capture_speech(
+        self, segment_silence: Optional[float] = None
+    ) -> Iterator[np.ndarray]:
+        """Record audio with voice activity detection, yielding speech segments.
+
+        With ``segment_silence`` unset a single segment is yielded once
+        SILENCE_DURATION of silence ends the utterance. When set, a segment is
+        also cut at every pause of that length (once it is at least
+        STREAM_MIN_SEGMENT long), so it can be transcribed while the user keeps
+        talking. Segments are views into the capture buffer and must be
+        consumed before the generator is resumed.
+
+        All durations are measured in samples read rather than wall-clock
+        time, so replayed audio behaves exactly like the microphone.
+        """
+        logger.info("Now listening... Start speaking!")
+
+        buffer = self._capture
+        buffer.clear()
+        self.vad.reset()
+        pre_roll_samples = int(PRE_ROLL_DURATION * SAMPLE_RATE)
+        segment_voiced = False
+        samples_read = 0
+        trigger_sample = None
+        segment_start = None
+        last_speech_sample = None
+        silence_start = None
+        speech_frames = frames = 0
+        vad_seconds = 0.0
+        if segment_silence is not None:
+            # Silence is only seen once the VAD hangover has run out, which
+            # already covers part of the pause
+            hangover = self.vad.hangover_frames * CHUNK_SIZE / SAMPLE_RATE
+            segment_silence = max(segment_silence - hangover, 0.0)
+
+        logger.info(f"Audio settings: {SAMPLE_RATE}Hz, {CHANNELS} channel(s), {DTYPE}")
+        logger.info(
+            f"VAD settings: engine={self.vad.name}, initial threshold={self.noise_floor.threshold:.4f}, silence_duration={SILENCE_DURATION}s"
+        )
+
+        with self._input_stream() as stream:
             while True:
+                if self.stop_requested.is_set():
+                    logger.info("Stop requested, ending recording...")
+                    break
+
                 # Read audio chunk
                 audio_chunk, overflowed = stream.read(CHUNK_SIZE)
                 if overflowed:
                     logger.warning("Audio buffer overflowed")
+                samples_read += len(audio_chunk)
+                frames += 1
+
+                # Convert to float for RMS calculation, reusing one frame buffer
+                frame = self._frame[: len(audio_chunk)]
+                np.multiply(audio_chunk, 1.0 / 32768.0, out=frame, casting="unsafe")
+                rms = self.calculate_rms(frame)
+
+                # Voice activity detection against the current estimate,
+                # then let this frame refine it
+                vad_start = time.perf_counter()
+                is_speech = self.vad.is_speech(frame, rms, self.noise_floor.threshold)
+                vad_seconds += time.perf_counter() - vad_start
+                self.noise_floor.update(rms)
 
-                # Convert to float for RMS calculation
-                audio_float = audio_chunk.astype(np.float32) / 32768.0
-                rms = self.calculate_rms(audio_float)
+                buffer.write(audio_chunk)
 
-                # Voice activity detection
-                if rms > adaptive_threshold:
+                if is_speech:
                     # Voice detected
-                    if not recording_started:
+                    if trigger_sample is None:
                         logger.info("Voice detected, recording started...")
-                        recording_started = True
-                        start_time = time.time()
+                        trigger_sample = samples_read - len(audio_chunk)
+                        segment_start = trigger_sample
 
-                    audio_buffer.append(audio_chunk)
+                    speech_frames += 1
+                    last_speech_sample = samples_read
+                    segment_voiced = True
                     silence_start = None
 
+                    if (
+                        segment_silence is not None
+                        and len(buffer) >= STREAM_MAX_SEGMENT * SAMPLE_RATE
+                    ):
+                        logger.info("Segment reached maximum length, cutting...")
+                        yield buffer.view()
+                        buffer.consume()
+                        segment_voiced = False
+                        segment_start = samples_read
+
+                elif trigger_sample is None:
+                    # Keep only the pre-roll until speech starts
+                    buffer.trim_to(pre_roll_samples)
+
                 else:
                     # Silence detected
-                    if recording_started:
-                        if silence_start is None:
-                            logger.debug("Silence detected, starting silence timer...")
-                            silence_start = time.time()
-
-                        # Add silence to buffer (up to silence duration)
-                        audio_buffer.append(audio_chunk)
-
-                        # Check if we've had enough silence
-                        silence_duration = time.time() - silence_start
-                        recording_duration = time.time() - start_time
-
-                        if (
-                            silence_duration >= SILENCE_DURATION
-                            and recording_duration >= MIN_RECORDING_DURATION
-                        ):
-                            logger.info(
-                                f"Silence duration ({silence_duration:.1f}s) reached threshold. Stopping recording..."
-                            )
-                            break
-
-                # Safety timeout (60 seconds max)
-                if time.time() - start_time > 60:
-                    logger.warning("Recording timeout (60s) reached, stopping...")
+                    if silence_start is None:
+                        logger.debug("Silence detected, starting silence timer...")
+                        silence_start = samples_read - len(audio_chunk)
+
+                    # Check if we've had enough silence
+                    silence_duration = (samples_read - silence_start) / SAMPLE_RATE
+                    recording_duration = (samples_read - trigger_sample) / SAMPLE_RATE
+
+                    if (
+                        silence_duration >= SILENCE_DURATION
+                        and recording_duration >= MIN_RECORDING_DURATION
+                    ):
+                        logger.info(
+                            f"Silence duration ({silence_duration:.1f}s) reached threshold. Stopping recording..."
+                        )
+                        break
+
+                    if (
+                        segment_silence is not None
+                        and silence_duration >= segment_silence
+                        and len(buffer) >= STREAM_MIN_SEGMENT * SAMPLE_RATE
+                    ):
+                        logger.info(
+                            f"Pause detected, sending {len(buffer) / SAMPLE_RATE:.2f}s segment"
+                        )
+                        yield buffer.view()
+                        buffer.consume()
+                        segment_voiced = False
+                        segment_start = samples_read
+
+                # Safety timeout, counted from the first speech if there was
+                # any; streamed segments are flushed as they go, so there it
+                # only caps the segment still being recorded
+                listened = samples_read - (segment_start or 0)
+                if listened > MAX_RECORDING_DURATION * SAMPLE_RATE:
+                    logger.warning(
+                        f"Recording timeout ({MAX_RECORDING_DURATION:.0f}s) reached, stopping..."
+                    )
                     break
 
-        finally:
-            stream.stop()
-            stream.close()
-
-        if not audio_buffer:
-            logger.warning("No audio recorded")
-            return b""
-
-        # Combine all audio chunks
-        combined_audio = np.concatenate(audio_buffer, axis=0)
-
-        # Convert to WAV format
-        wav_buffer = io.BytesIO()
-        sf.write(wav_buffer, combined_audio, SAMPLE_RATE, format="WAV")
-
-        duration = len(combined_audio) / SAMPLE_RATE
-        logger.info(f"Recorded {duration:.2f} seconds of audio")
+        # Positions are in samples from the start of the stream
+        self.last_capture = {
+            "ended_at": time.perf_counter(),
+            "samples": samples_read,
+            "trigger_sample": trigger_sample,
+            "last_speech_sample": last_speech_sample,
+            "frames": frames,
+            "speech_frames": speech_frames,
+            "vad_seconds": vad_seconds,
+        }
+        logger.info(
+            f"Noise floor: {self.noise_floor.floor:.4f}, "
+            f"threshold: {self.noise_floor.threshold:.4f}"
+        )
+        self.noise_floor.save()
+
+        # A buffer holding only trailing silence is not worth transcribing
+        if segment_voiced:
+            yield buffer.view()
+            buffer.consume()
+
+    def encode_audio(self, audio: np.ndarray) -> bytes:
+        """Encode int16 samples in memory with the configured upload codec."""
+        file_format, subtype = UPLOAD_CODECS[self.codec][:2]
+        with self._stage("encode"):
+            encoded = io.BytesIO()
+            sf.write(encoded, audio, SAMPLE_RATE, format=file_format, subtype=subtype)
+            return encoded.getvalue()
+
+    def record_with_vad(self) -> Tuple[bytes, float]:
+        """Record a single utterance with voice activity detection.
+
+        Returns the encoded audio and its duration in seconds.
+        """
+        # Without segment_silence there is at most one segment
+        for segment in self.capture_speech():
+            duration = len(segment) / SAMPLE_RATE
+            encoded = self.encode_audio(segment)
+            logger.info(
+                f"Recorded {duration:.2f} seconds of audio "
+                f"({len(encoded) / 1024:.0f} KiB {self.codec})"
+            )
+            return encoded, duration
 
-        return wav_buffer.getvalue()
+        logger.warning("No audio recorded")
+        return b"", 0.0
 
     def listen_and_transcribe(self):
         """Record audio with VAD, transcribe, and type the result."""
@@ -303,11 +1108,11 @@ class VoiceToText:
         try:
             # Record audio with voice activity detection
             logger.info("Starting voice activity detection...")
-            audio_data = self.record_with_vad()
+            audio_data, duration = self.record_with_vad()
 
             if audio_data:
                 logger.info("Audio recorded successfully, starting transcription...")
-                text = self.transcribe_audio(audio_data)
+                text = self.transcribe_audio(audio_data, duration)
 
                 if text and len(text.strip()) > 0:
                     logger.info(f"Transcription successful: '{text}'")
@@ -323,34 +1128,573 @@ class VoiceToText:
         except Exception as e:
             logger.error(f"Unexpected error occurred: {e}")
         finally:
+            self.finish_typing()
             logger.info("=== Voice-to-Text Session Ended ===\n")
 
+    def stream_and_transcribe(self):
+        """Transcribe and type speech segment by segment while still recording.
+
+        Segments cut at natural pauses are uploaded on a small worker pool as
+        soon as they are captured. A typing thread waits on the results in
+        capture order, so text appears in the right order while later
+        segments are still being recorded or transcribed.
+        """
+        logger.info("=== Voice-to-Text Streaming Session Started ===")
+        logger.info(
+            f"Segments are cut at {STREAM_SEGMENT_SILENCE}s pauses; "
+            f"session ends after {SILENCE_DURATION}s of silence."
+        )
+        logger.info("Press Ctrl+C to abort")
+        logger.info(f"Log file: {LOG_FILE}")
+
+        pending: "queue.Queue[Optional[Future]]" = queue.Queue()
+        typer = threading.Thread(target=self._type_in_order, args=(pending,))
+        typer.start()
+
+        try:
+            with ThreadPoolExecutor(max_workers=STREAM_WORKERS) as executor:
+                try:
+                    for index, segment in enumerate(
+                        self.capture_speech(segment_silence=STREAM_SEGMENT_SILENCE)
+                    ):
+                        duration = len(segment) / SAMPLE_RATE
+                        logger.info(f"Queueing segment {index} ({duration:.2f}s)")
+                        pending.put(
+                            executor.submit(
+                                self.transcribe_audio,
+                                self.encode_audio(segment),
+                                duration,
+                            )
+                        )
+                except KeyboardInterrupt:
+                    logger.info("Session aborted by user")
+                except Exception as e:
+                    logger.error(f"Unexpected error occurred: {e}")
+        finally:
+            pending.put(None)
+            typer.join()
+            self.finish_typing()
+            logger.info("=== Voice-to-Text Streaming Session Ended ===\n")
+
+    def _type_in_order(self, pending: "queue.Queue[Optional[Future]]"):
+        """Type finished segment transcriptions in capture order."""
+        typed_any = False
+        while True:
+            future = pending.get()
+            if future is None:
+                break
+
+            try:
+                text = future.result()
+            except Exception as e:
+                logger.error(f"Segment transcription failed: {e}")
+                continue
+
+            if not text:
+                logger.warning("Segment produced no text")
+                continue
+
+            # Separate consecutive segments the way dictated sentences would be
+            self.type_text(f" {text}" if typed_any else text)
+            typed_any = True
+
+        if not typed_any:
+            logger.warning("No speech detected or transcription failed")
+
+
+class _CommandHandler(socketserver.StreamRequestHandler):
+    """Read one command line from a client and write back one reply line."""
+
+    def handle(self):
+        command = self.rfile.readline().decode().strip().lower()
+        reply = self.server.dispatch(command)
+        try:
+            self.wfile.write(f"{reply}\n".encode())
+        except (BrokenPipeError, ConnectionResetError):
+            # Fire-and-forget clients like the socat keybind hang up before
+            # a "start"/"toggle" session ends; the session ran all the same
+            logger.debug(f"Client left before the {command!r} reply")
+
+
+class VoiceToTextDaemon(socketserver.ThreadingUnixStreamServer):
+    """Long-lived voice-to-text process controlled over a Unix socket.
+
+    Keeps the audio stream, HTTP session and noise floor estimate warm so a
+    session starts capturing as soon as the command arrives. Commands are
+    single lines: ``start`` (replies ``done`` when the session finishes),
+    ``stop``, ``toggle`` and ``status``.
+    """
+
+    daemon_threads = True
+
+    def __init__(
+        self, vtt: VoiceToText, stream_mode: bool, socket_path: str = SOCKET_PATH
+    ):
+        self.vtt = vtt
+        self.stream_mode = stream_mode
+        self.socket_path = socket_path
+        self._session_lock = threading.Lock()
+
+        # The singleton lock is already held, so any existing socket is stale
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        super().__init__(socket_path, _CommandHandler)
+
+    @property
+    def busy(self) -> bool:
+        return self._session_lock.locked()
+
+    def dispatch(self, command: str) -> str:
+        logger.info(f"Daemon command: {command!r}")
+        if command == "start":
+            return self.run_session()
+        if command == "stop":
+            return self.stop_session()
+        if command == "toggle":
+            return self.stop_session() if self.busy else self.run_session()
+        if command == "status":
+            state = "recording" if self.busy else "idle"
+            return f"{state} threshold={self.vtt.noise_floor.threshold:.4f}"
+        return f"error unknown command {command!r}"
+
+    def run_session(self) -> str:
+        if not self._session_lock.acquire(blocking=False):
+            return "busy"
+        try:
+            self.vtt.stop_requested.clear()
+            if self.stream_mode:
+                self.vtt.stream_and_transcribe()
+            else:
+                self.vtt.listen_and_transcribe()
+            return "done"
+        finally:
+            self._session_lock.release()
+
+    def stop_session(self) -> str:
+        if not self.busy:
+            return "idle"
+        # Ends the capture loop; whatever was recorded is still transcribed
+        self.vtt.stop_requested.set()
+        return "stopping"
+
+    def server_close(self):
+        super().server_close()
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+
+
+def send_command(command: str, socket_path: str = SOCKET_PATH) -> str:
+    """Send a command to a running daemon and return its reply."""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        client.connect(socket_path)
+        client.sendall(f"{command}\n".encode())
+        with client.makefile("r") as reply:
+            return reply.readline().strip()
+
+
+class FileAudioSource:
+    """Replays int16 samples through the ``sd.InputStream`` read API.
+
+    After the samples run out it keeps returning digital silence for
+    ``tail`` seconds so the VAD can see the end of speech, then calls
+    ``on_exhausted``. With ``realtime`` set, reads are paced like a
+    microphone; otherwise audio is replayed as fast as it is consumed.
+    """
+
+    def __init__(
+        self,
+        samples: np.ndarray,
+        realtime: bool = False,
+        tail: float = SILENCE_DURATION + 1.0,
+        on_exhausted=None,
+    ):
+        self.samples = samples.reshape(-1, CHANNELS)
+        self.realtime = realtime
+        self.end = len(self.samples) + int(tail * SAMPLE_RATE)
+        self.on_exhausted = on_exhausted
+        self._position = 0
+        self._started_at = 0.0
+
+    def start(self):
+        self._position = 0
+        self._started_at = time.perf_counter()
+
+    def stop(self):
+        pass
+
+    def close(self):
+        pass
+
+    def read(self, frames: int) -> Tuple[np.ndarray, bool]:
+        if self.realtime:
+            due = self._started_at + (self._position + frames) / SAMPLE_RATE
+            delay = due - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+
+        chunk = np.zeros((frames, CHANNELS), dtype=DTYPE)
+        available = self.samples[self._position : self._position + frames]
+        chunk[: len(available)] = available
+        self._position += frames
+        if self._position >= self.end and self.on_exhausted is not None:
+            self.on_exhausted()
+        return chunk, False
+
+
+class _StandInHandler(http.server.BaseHTTPRequestHandler):
+    """Fake /v1/audio/transcriptions that answers after a simulated delay."""
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        message = email.parser.BytesParser().parsebytes(
+            f"Content-Type: {self.headers['Content-Type']}\r\n\r\n".encode() + body
+        )
+        duration = 0.0
+        for part in message.walk():
+            if part.get_filename():
+                duration = sf.info(io.BytesIO(part.get_payload(decode=True))).duration
+
+        time.sleep(self.server.latency + self.server.rtf * duration)
+        reply = json.dumps({"text": self.server.text}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(reply)))
+        self.end_headers()
+        self.wfile.write(reply)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class BenchmarkVoiceToText(VoiceToText):
+    """VoiceToText that records when text would be typed instead of typing it."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.typed_at: List[float] = []
+
+    def type_text(self, text: str):
+        self.typed_at.append(time.perf_counter())
+
+
+def load_fixture(path: Path) -> Tuple[np.ndarray, Dict]:
+    """Read a WAV fixture as mono int16 at SAMPLE_RATE plus its labels.
+
+    Labels come from an optional ``<name>.json`` next to the WAV:
+    ``speech`` (false for noise-only fixtures), ``speech_end`` (seconds)
+    and ``text`` (what the stand-in server answers).
+    """
+    audio, rate = sf.read(path, dtype="float32", always_2d=True)
+    audio = audio.mean(axis=1)
+    if rate != SAMPLE_RATE:
+        positions = np.arange(0, len(audio), rate / SAMPLE_RATE)
+        audio = np.interp(positions, np.arange(len(audio)), audio)
+    samples = np.clip(audio * 32768.0, -32768, 32767).astype(DTYPE)
+
+    labels = {"speech": True}
+    label_path = path.with_suffix(".json")
+    if label_path.exists():
+        labels.update(json.loads(label_path.read_text()))
+    return samples, labels
+
+
+def _percentiles(values: List[float], scale: float = 1000.0) -> str:
+    if not values:
+        return f"{'-':>9}{'-':>9}{'-':>9}{0:>6}"
+    p50, p90, p99 = np.percentile(np.asarray(values) * scale, [50, 90, 99])
+    return f"{p50:9.1f}{p90:9.1f}{p99:9.1f}{len(values):6d}"
+
+
+def run_benchmark(args):
+    """Replay WAV fixtures through the real VAD and transcription pipeline.
+
+    The microphone is replaced by FileAudioSource and, unless --bench-live
+    is given, speaches.ai by a local stand-in server with configurable
+    latency. Typing is recorded rather than performed, so its cost is not
+    part of the results. Reports per-stage latency percentiles, end of
+    speech to text being ready for typing, and VAD false-trigger rates on
+    fixtures labelled as noise.
+    """
+    fixtures = sorted(Path(args.benchmark).glob("*.wav"))
+    if not fixtures:
+        print(f"No .wav fixtures found in {args.benchmark}")
+        sys.exit(1)
+
+    # Session logging would drown the report
+    logger.setLevel(logging.ERROR)
+
+    server = None
+    base_url, fallback_urls, backend = args.base_url, args.fallback_url, args.backend
+    if not args.bench_live:
+        server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), _StandInHandler)
+        server.latency = args.server_latency
+        server.rtf = args.server_rtf
+        server.text = ""
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base_url = f"http://127.0.0.1:{server.server_address[1]}"
+        fallback_urls, backend = [], "server"
+
+    vtt = BenchmarkVoiceToText(
+        base_url,
+        args.model,
+        make_vad(args.vad),
+        args.codec,
+        fallback_urls=fallback_urls,
+        backend=backend,
+        local=LocalWhisperBackend(args.local_model, args.compute_type, args.threads),
+    )
+
+    end_detection: List[float] = []
+    first_text: List[float] = []
+    final_text: List[float] = []
+    vad_frame: List[float] = []
+    speech_runs = missed = noise_runs = false_triggers = 0
+    noise_frames = noise_speech_frames = 0
+
+    try:
+        for path in fixtures:
+            samples, labels = load_fixture(path)
+            if server is not None:
+                server.text = labels.get("text", "benchmark transcription")
+
+            for _ in range(args.runs):
+                # Every run starts from the same untrained noise floor
+                vtt.noise_floor = NoiseFloorTracker()
+                vtt.typed_at = []
+                vtt.stop_requested.clear()
+                vtt.attach_stream(
+                    FileAudioSource(
+                        samples, args.realtime, on_exhausted=vtt.stop_requested.set
+                    )
+                )
+                if args.stream:
+                    vtt.stream_and_transcribe()
+                else:
+                    vtt.listen_and_transcribe()
+
+                capture = vtt.last_capture
+                triggered = capture["trigger_sample"] is not None
+                vad_frame.append(capture["vad_seconds"] / max(capture["frames"], 1))
+
+                if not labels["speech"]:
+                    noise_runs += 1
+                    false_triggers += triggered
+                    noise_frames += capture["frames"]
+                    noise_speech_frames += capture["speech_frames"]
+                    continue
+
+                speech_runs += 1
+                if not triggered:
+                    missed += 1
+                    continue
+
+                speech_end = labels.get(
+                    "speech_end", capture["last_speech_sample"] / SAMPLE_RATE
+                )
+                # Audio still to be heard after speech ended when capture stopped
+                end_delay = capture["samples"] / SAMPLE_RATE - speech_end
+                end_detection.append(end_delay)
+                if vtt.typed_at:
+                    first_text.append(vtt.typed_at[0] - capture["ended_at"] + end_delay)
+                    final_text.append(
+                        vtt.typed_at[-1] - capture["ended_at"] + end_delay
+                    )
+    finally:
+        vtt.close()
+        if server is not None:
+            server.shutdown()
+
+    mode = "streaming" if args.stream else "single utterance"
+    replay = "realtime" if args.realtime else "fast"
+    target = base_url if server is None else "stand-in server"
+    print(
+        f"Benchmark: {len(fixtures)} fixture(s) x {args.runs} run(s), {mode}, "
+        f"{replay} replay, vad={vtt.vad.name}, codec={vtt.codec}, {target}"
+    )
+    print(f"{'stage':<36}{'p50':>9}{'p90':>9}{'p99':>9}{'n':>6}")
+    rows = [
+        ("VAD per frame (us)", vad_frame, 1e6),
+        ("end-of-speech detection (ms)", end_detection, 1e3),
+        ("encode (ms)", vtt.stage_times["encode"], 1e3),
+        ("upload + transcription (ms)", vtt.stage_times["transcribe"], 1e3),
+        ("end of speech -> first text (ms)", first_text, 1e3),
+        ("end of speech -> final text (ms)", final_text, 1e3),
+    ]
+    for name, values, scale in rows:
+        print(f"{name:<36}{_percentiles(values, scale)}")
+
+    if speech_runs:
+        print(f"Speech runs missed by VAD: {missed}/{speech_runs}")
+    if noise_runs:
+        frame_rate = noise_speech_frames / max(noise_frames, 1)
+        print(
+            f"Noise runs falsely triggered: {false_triggers}/{noise_runs} "
+            f"({false_triggers / noise_runs:.0%}), "
+            f"false speech frames: {frame_rate:.2%}"
+        )
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Voice-to-Text Tool with Voice Activity Detection",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=f"""This tool will:
+1. Listen for voice activity
+2. Record until you stop speaking ({SILENCE_DURATION} seconds of silence)
+3. Send audio to speaches.ai for transcription
+4. Type or paste the transcribed text and exit
+
+Configuration:
+- Initial silence threshold: {SILENCE_THRESHOLD} (adapts to the room)
+- Silence duration: {SILENCE_DURATION}s
+- Min recording: {MIN_RECORDING_DURATION}s
+
+Make sure:
+- speaches.ai is running on the specified URL
+- wtype and wl-clipboard are installed (or ydotoold runs, for --inject ydotool)
+- The target text field is focused
+
+To watch logs in real-time:
+tail -f {LOG_FILE}""",
+    )
+    parser.add_argument(
+        "base_url", nargs="?", default=SPEACHES_BASE_URL, help="speaches.ai base URL"
+    )
+    parser.add_argument("model", nargs="?", default=MODEL, help="Whisper model name")
+    parser.add_argument(
+        "--fallback-url",
+        action="append",
+        default=list(FALLBACK_BASE_URLS),
+        metavar="URL",
+        help="Extra speaches.ai endpoint tried in order when the main one fails",
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Transcribe and type each phrase at natural pauses while still talking",
+    )
+    parser.add_argument(
+        "--vad",
+        choices=sorted(VAD_ENGINES),
+        default=VAD_ENGINE,
+        help=f"Voice activity detector (default: {VAD_ENGINE})",
+    )
+    parser.add_argument(
+        "--backend",
+        choices=["auto", "server", "local"],
+        default=TRANSCRIBE_BACKEND,
+        help="Transcribe with speaches.ai, in-process faster-whisper, "
+        f"or speaches.ai with local fallback (default: {TRANSCRIBE_BACKEND})",
+    )
+    parser.add_argument(
+        "--local-model",
+        default=LOCAL_MODEL,
+        help=f"faster-whisper model for the local backend (default: {LOCAL_MODEL})",
+    )
+    parser.add_argument(
+        "--compute-type",
+        default=LOCAL_COMPUTE_TYPE,
+        help=f"CTranslate2 compute type for the local backend (default: {LOCAL_COMPUTE_TYPE})",
+    )
+    parser.add_argument(
+        "--threads",
+        type=int,
+        default=LOCAL_CPU_THREADS,
+        help=f"CPU threads for the local backend (default: {LOCAL_CPU_THREADS})",
+    )
+    parser.add_argument(
+        "--inject",
+        choices=sorted(INJECTORS),
+        default=INJECT_BACKEND,
+        help="How text reaches the focused window: wtype keystrokes, a clipboard "
+        f"paste, ydotoold, or auto by length and app (default: {INJECT_BACKEND})",
+    )
+    parser.add_argument(
+        "--codec",
+        choices=sorted(UPLOAD_CODECS),
+        default=UPLOAD_CODEC,
+        help=f"Audio codec used for uploads (default: {UPLOAD_CODEC})",
+    )
+    parser.add_argument(
+        "--benchmark",
+        metavar="DIR",
+        help="Replay the WAV fixtures in DIR and report per-stage latency",
+    )
+    parser.add_argument(
+        "--runs",
+        type=int,
+        default=BENCH_RUNS,
+        help=f"Benchmark replays per fixture (default: {BENCH_RUNS})",
+    )
+    parser.add_argument(
+        "--realtime",
+        action="store_true",
+        help="Pace benchmark replay like a live microphone (use with --stream)",
+    )
+    parser.add_argument(
+        "--bench-live",
+        action="store_true",
+        help="Benchmark against the configured backends instead of a stand-in server",
+    )
+    parser.add_argument(
+        "--server-latency",
+        type=float,
+        default=BENCH_SERVER_LATENCY,
+        help=f"Stand-in server seconds per request (default: {BENCH_SERVER_LATENCY})",
+    )
+    parser.add_argument(
+        "--server-rtf",
+        type=float,
+        default=BENCH_SERVER_RTF,
+        help=f"Stand-in server seconds per second of audio (default: {BENCH_SERVER_RTF})",
+    )
+    parser.add_argument(
+        "--daemon",
+        action="store_true",
+        help=f"Stay resident and take start/stop/toggle commands on {SOCKET_PATH}",
+    )
+    parser.add_argument(
+        "--send",
+        metavar="COMMAND",
+        help="Send a command (start, stop, toggle, status) to the daemon",
+    )
+    return parser.parse_args()
+
+
+def run_daemon(vtt: VoiceToText, stream_mode: bool):
+    """Keep the pipeline warm and serve socket commands until terminated."""
+    # Turn SIGTERM into a normal exit so the socket and lock get cleaned up
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+
+    vtt.keep_warm()
+    server = VoiceToTextDaemon(vtt, stream_mode)
+    logger.info(f"Daemon listening on {SOCKET_PATH}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logger.info("Daemon interrupted")
+    finally:
+        vtt.stop_requested.set()
+        server.server_close()
+        vtt.close()
+        logger.info("Daemon stopped")
+
 
 def main():
     """Entry point for the script."""
-    if len(sys.argv) > 1:
-        if sys.argv[1] in ["-h", "--help"]:
-            print("Voice-to-Text Tool with Voice Activity Detection")
-            print("Usage: uv run voice_to_text.py [base_url] [model]")
-            print(f"Default base_url: {SPEACHES_BASE_URL}")
-            print(f"Default model: {MODEL}")
-            print(f"Log file: {LOG_FILE}")
-            print("\nThis tool will:")
-            print("1. Listen for voice activity")
-            print("2. Record until you stop speaking (2 seconds of silence)")
-            print("3. Send audio to speaches.ai for transcription")
-            print("4. Type the transcribed text using wtype and exit")
-            print("\nConfiguration:")
-            print(f"- Silence threshold: {SILENCE_THRESHOLD}")
-            print(f"- Silence duration: {SILENCE_DURATION}s")
-            print(f"- Min recording: {MIN_RECORDING_DURATION}s")
-            print("\nMake sure:")
-            print("- speaches.ai is running on the specified URL")
-            print("- wtype is installed (sudo apt install wtype)")
-            print("- The target text field is focused")
-            print("\nTo watch logs in real-time:")
-            print(f"tail -f {LOG_FILE}")
-            return
+    args = parse_args()
+
+    if args.benchmark:
+        run_benchmark(args)
+        return
+
+    if args.send:
+        try:
+            print(send_command(args.send))
+        except OSError as e:
+            logger.error(f"Cannot reach voice-to-text daemon at {SOCKET_PATH}: {e}")
+            sys.exit(1)
+        return
 
     # Acquire singleton lock
     if not acquire_lock():
@@ -358,34 +1702,45 @@ def main():
         sys.exit(1)
 
     try:
-        # Parse command line arguments
-        base_url = sys.argv[1] if len(sys.argv) > 1 else SPEACHES_BASE_URL
-        model = sys.argv[2] if len(sys.argv) > 2 else MODEL
+        base_url = args.base_url
+        model = args.model
 
         # Log initial configuration
         logger.info("Starting Voice-to-Text Tool")
         logger.info(f"Base URL: {base_url}")
+        if args.fallback_url:
+            logger.info(f"Fallback URLs: {', '.join(args.fallback_url)}")
         logger.info(f"Model: {model}")
+        logger.info(f"Backend: {args.backend}")
+        logger.info(f"VAD engine: {args.vad}")
+        logger.info(f"Upload codec: {args.codec}")
+        logger.info(f"Text injection: {args.inject}")
         logger.info(f"Log file: {LOG_FILE}")
 
-        # Check if speaches.ai is running
+        # Create and run the voice-to-text system
         try:
-            logger.info("Checking speaches.ai connection...")
-            response = requests.get(f"{base_url}/health", timeout=5)
-            if response.status_code != 200:
-                logger.warning(
-                    f"speaches.ai might not be running at {base_url} (status: {response.status_code})"
-                )
-            else:
-                logger.info("speaches.ai connection successful")
-        except requests.RequestException as e:
-            logger.error(f"Cannot connect to speaches.ai at {base_url}: {e}")
-            logger.error("Make sure speaches.ai is running.")
+            vtt = VoiceToText(
+                base_url,
+                model,
+                make_vad(args.vad),
+                args.codec,
+                fallback_urls=args.fallback_url,
+                backend=args.backend,
+                local=LocalWhisperBackend(
+                    args.local_model, args.compute_type, args.threads
+                ),
+                injector=INJECTORS[args.inject](),
+            )
+        except RuntimeError as e:
+            logger.error(f"Cannot start: {e}")
             sys.exit(1)
 
-        # Create and run the voice-to-text system
-        vtt = VoiceToText(base_url, model)
-        vtt.listen_and_transcribe()
+        if args.daemon:
+            run_daemon(vtt, args.stream)
+        elif args.stream:
+            vtt.stream_and_transcribe()
+        else:
+            vtt.listen_and_transcribe()
 
     finally:
         # Always release the lock when exiting